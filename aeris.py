@@ -1,120 +1,384 @@
+import time
+STARTED_AT = time.perf_counter()
+
 import asyncio
+import itertools
+import queue
 import threading
 
 from bootstrap import bootstrap
 bootstrap()
 
-from voice_input import record_voice, listen_for_wake_word, stop_listening_flag
+from voice_input import (
+    record_voice,
+    listen_for_wake_word,
+    stop_listening_flag,
+    set_level_callback,
+    load_model_async,
+    watch_for_barge_in,
+)
 from brain import get_llm_output
-from tts import edge_speak, stop_speaking
+from intent_router import route_intent, INTERRUPT_MATCHER, ALARM_MATCHER
+from tts import edge_speak, stop_speaking, prewarm_cache
 from interface import AerisUI
+from http_client import warm_up, close_session
 
 from systems.launch_app import open_app
 from systems.internet_search import web_search
 from systems.weather_info import weather_action
 from systems.alarm_system import AlarmManager
 from systems.message_sender import send_message
-from systems.aircraft_report import handle_aircraft_command
+from systems.aircraft_report import handle_aircraft_command, is_aircraft_command
 
 from memory.memory_manager import load_memory, update_memory
+from memory.fact_store import retrieve_facts, format_fact
+from prompt_builder import HISTORY_TOKEN_BUDGET
 from memory.temporary_memory import TemporaryMemory
+from prefetch import SpeculativePrefetcher
+from turn_manager import Turn, TurnManager
+from tracing import span, start_trace, current_trace, export_jsonl, TRACE_ENABLED
 
 
-interrupt_commands = ["mute", "quit", "exit", "stop"]
 temp_memory = TemporaryMemory()
 alarm_manager = AlarmManager()
+turn_manager = TurnManager()
 
 MAIN_LOOP = None
 
+# Intents whose envelope "text" is the reply itself, so it can be shown
+# and spoken while it streams. Tool intents answer after the tool runs.
+STREAMED_INTENTS = ("chat",)
+
+
+def report_startup(stage: str):
+    print(f"Startup: {stage} after {(time.perf_counter() - STARTED_AT) * 1000:.0f} ms")
+
+
+def build_llm_context(user_text: str) -> tuple[dict, list[str]]:
+    load_memory()  # seeds the fact index on first use
+    memory_for_prompt = {}
+
+    facts = retrieve_facts(user_text)
+    if facts:
+        memory_for_prompt["known_facts"] = [format_fact(f) for f in facts]
+
+    summary, history = temp_memory.snapshot_history(HISTORY_TOKEN_BUDGET)
+    if summary:
+        memory_for_prompt["conversation_summary"] = summary
+
+    if history:
+        memory_for_prompt["recent_conversation"] = history
+
+    return memory_for_prompt, ["identity.name"] + [f["path"] for f in facts]
+
+
+def remember_local_turn(user_text: str, intent: str, result: str | None):
+    """Keeps turns handled without the LLM in the history it sees later."""
+    temp_memory.set_last_user_text(user_text, intent)
+    if result:
+        temp_memory.add_tool_result(intent, result)
+
+
+def needs_llm(user_text: str) -> bool:
+    return not (
+        INTERRUPT_MATCHER(user_text)
+        or ALARM_MATCHER(user_text)
+        or is_aircraft_command(user_text)
+        or route_intent(user_text) is not None
+    )
+
+
+def prefetch_llm(user_text: str, cancel_event: threading.Event, on_text, on_field):
+    memory_for_prompt, memory_paths = build_llm_context(user_text)
+    return get_llm_output(
+        user_text,
+        memory_for_prompt,
+        on_text=on_text,
+        on_field=on_field,
+        memory_paths=memory_paths,
+        cancel_event=cancel_event
+    )
+
+
+prefetcher = SpeculativePrefetcher(prefetch_llm, should_prefetch=needs_llm)
+
 
 async def get_voice_input():
-    return await asyncio.to_thread(record_voice)
+    prefetcher.reset()
+    return await asyncio.to_thread(record_voice, on_partial=prefetcher.on_partial)
 
 
-def speak_with_state(ui: AerisUI, response: str):
+def speak_with_state(ui: AerisUI, response: str, cancel_event: threading.Event | None = None):
     try:
-        edge_speak(response, ui)
+        edge_speak(response, ui, cancel_event)
     except Exception as e:
         print("Speak error:", e)
 
 
+def interrupt_turn(ui: AerisUI):
+    stop_speaking()
+    turn_manager.interrupt()
+    prefetcher.reset()
+    ui.remove_chat_loading()
+    ui.stop_speaking()
+    ui.stop_processing()
+
+
+async def speak(ui: AerisUI, text: str, turn: Turn):
+    """
+    Speaks off the event loop. Meanwhile a barge-in watcher listens on the
+    audio pipeline, so a spoken "stop" cuts the turn short. Playback is
+    tied to the turn's cancel_event, so a newer turn never revives it.
+    """
+    loop = asyncio.get_running_loop()
+    done = threading.Event()
+
+    def on_barge_in():
+        turn.cancel_event.set()
+        loop.call_soon_threadsafe(interrupt_turn, ui)
+
+    threading.Thread(
+        target=watch_for_barge_in,
+        args=(on_barge_in, done),
+        daemon=True
+    ).start()
+
+    try:
+        with span("tts", chars=len(text) if isinstance(text, str) else None):
+            await asyncio.to_thread(speak_with_state, ui, text, turn.cancel_event)
+    except asyncio.CancelledError:
+        turn.cancel_event.set()
+        raise
+    finally:
+        done.set()
+
+
+async def deliver(ui: AerisUI, turn: Turn, text: str, use_tts: bool):
+    if not turn_manager.is_current(turn):
+        print(f" Dropping result of stale turn {turn.id}")
+        return
+
+    ui.write_log(f"AI: {text}")
+    if use_tts:
+        await speak(ui, text, turn)
+    else:
+        ui.stop_processing()
+
+
+def _first_text(chunks) -> str | None:
+    """Blocks until chunks yields something besides whitespace."""
+    for chunk in chunks:
+        if chunk.strip():
+            return chunk.lstrip()
+    return None
+
+
+async def deliver_stream(ui: AerisUI, turn: Turn, chunks, use_tts: bool):
+    if not turn_manager.is_current(turn):
+        return
+
+    # No bubble until there is text: an empty reply leaves nothing behind
+    # and run_turn answers it like any other empty response.
+    head = await asyncio.to_thread(_first_text, chunks)
+    if head is None:
+        return
+    chunks = itertools.chain([head], chunks)
+
+    if not use_tts:
+        ui.write_log(itertools.chain(["AI: "], chunks))
+        ui.stop_processing()
+        return
+
+    # The chat log is typed as the chunks reach speech, not after playback.
+    shown = queue.Queue()
+
+    def tee():
+        for chunk in chunks:
+            shown.put(chunk)
+            yield chunk
+        shown.put(None)
+
+    ui.write_log(itertools.chain(["AI: "], iter(shown.get, None)))
+
+    try:
+        await speak(ui, tee(), turn)
+    finally:
+        shown.put(None)
+
+
+class ReplyStream:
+    """
+    Hands the LLM's "text" deltas to deliver_stream() while they arrive,
+    once the envelope's intent shows the text is the reply itself.
+    on_text/on_field are called on the LLM thread.
+    """
+
+    def __init__(self, ui: AerisUI, turn: Turn, use_tts: bool):
+        self.loop = asyncio.get_running_loop()
+        self.ui = ui
+        self.turn = turn
+        self.use_tts = use_tts
+        self.text = ""
+        self.task = None
+        self._chunks = None
+
+    def on_field(self, name, value):
+        if name == "intent" and value in STREAMED_INTENTS and self._chunks is None:
+            self._chunks = queue.Queue()
+            if self.text:
+                self._chunks.put(self.text)
+            self.loop.call_soon_threadsafe(self._start)
+
+    def on_text(self, delta):
+        self.text += delta
+        if self._chunks is not None:
+            self._chunks.put(delta)
+
+    @property
+    def started(self) -> bool:
+        return self._chunks is not None
+
+    def _start(self):
+        self.task = asyncio.create_task(
+            deliver_stream(self.ui, self.turn, self._iter_chunks(), self.use_tts)
+        )
+
+    def _iter_chunks(self):
+        while (chunk := self._chunks.get()) is not None:
+            yield chunk
+
+    def close(self):
+        if self._chunks is not None:
+            self._chunks.put(None)
+
+    async def wait(self) -> bool:
+        """Waits for the streamed delivery. True if the reply went out that way."""
+        if self._chunks is None:
+            return False
+
+        while self.task is None:
+            await asyncio.sleep(0)
+
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            self.task.cancel()
+            raise
+
+        return bool(self.text.strip())
+
+
 async def process_user_input(ui: AerisUI, user_text: str, use_tts: bool):
 
     if not user_text:
         return
 
-    lower_text = user_text.lower()
-
-    if any(cmd in lower_text for cmd in interrupt_commands):
-        stop_speaking()
+    if INTERRUPT_MATCHER(user_text):
+        interrupt_turn(ui)
         temp_memory.reset()
-        ui.stop_speaking()
-        ui.stop_processing()
         return
 
-    ui.start_processing()
+    if current_trace() is None:
+        start_trace()
+
+    turn = turn_manager.begin()
+    with span("turn", turn=turn.id, voice=use_tts) as s:
+        completed = await turn_manager.run(turn, run_turn(ui, user_text, use_tts, turn))
+        s.set(completed=completed)
 
-    alarm_keywords = ["set alarm", "wake me up", "alarm at", "alarm in"]
+    if TRACE_ENABLED:
+        await asyncio.to_thread(export_jsonl)
 
-    if any(k in lower_text for k in alarm_keywords):
+    if not completed and turn_manager.current is None:
+        ui.remove_chat_loading()
+        ui.stop_processing()
+
+
+async def run_turn(ui: AerisUI, user_text: str, use_tts: bool, turn: Turn):
+
+    ui.start_processing()
+
+    if ALARM_MATCHER(user_text):
+        prefetcher.reset()
 
         result = alarm_manager.create_alarm(
             ui,
             user_text,
             speak_with_state
         )
+        remember_local_turn(user_text, "alarm", result)
 
         if result:
-            ui.write_log(f"AI: {result}")
-            if use_tts:
-                speak_with_state(ui, result)
-            else:
-                ui.stop_processing()
+            await deliver(ui, turn, result, use_tts)
 
         return
 
     try:
-        aircraft_response = handle_aircraft_command(user_text)
+        with span("aircraft"):
+            aircraft_response = await asyncio.to_thread(handle_aircraft_command, user_text)
         if aircraft_response:
-            ui.write_log(f"AI: {aircraft_response}")
-            if use_tts:
-                speak_with_state(ui, aircraft_response)
-            else:
-                ui.stop_processing()
+            prefetcher.reset()
+            remember_local_turn(user_text, "aircraft", aircraft_response)
+            await deliver(ui, turn, aircraft_response, use_tts)
             return
     except Exception as e:
-        error_msg = f"Aircraft system error: {e}"
-        ui.write_log(f"AI: {error_msg}")
-        if use_tts:
-            speak_with_state(ui, error_msg)
-        else:
-            ui.stop_processing()
+        prefetcher.reset()
+        remember_local_turn(user_text, "aircraft", f"Aircraft system error: {e}")
+        await deliver(ui, turn, f"Aircraft system error: {e}", use_tts)
         return
 
-    long_term_memory = load_memory()
-    memory_for_prompt = {}
-
-    identity = long_term_memory.get("identity", {})
-    if "name" in identity:
-        memory_for_prompt["user_name"] = identity["name"].get("value")
+    with span("route.local") as s:
+        llm_output = route_intent(user_text)
+        s.set(routed=llm_output is not None)
+
+    if llm_output is not None:
+        # Handled locally: nothing will claim an in-flight prefetch.
+        prefetcher.reset()
+
+    streamed = False
+
+    if llm_output is None:
+        reply = ReplyStream(ui, turn, use_tts)
+
+        try:
+            # A prefetch hit replays what it has streamed so far into reply
+            # and forwards the rest live, so it reaches the user as early.
+            with span("prefetch.claim") as s:
+                llm_output = await asyncio.to_thread(
+                    prefetcher.claim,
+                    user_text,
+                    on_text=reply.on_text,
+                    on_field=reply.on_field,
+                    cancel_event=turn.cancel_event
+                )
+                s.set(hit=llm_output is not None)
+
+            # A prefetch that failed after it started streaming keeps what
+            # was shown; asking again would repeat it.
+            if llm_output is None and not reply.started:
+                # Fact retrieval is a synchronous SQLite/FTS5 query; keep it off the loop.
+                with span("memory.context"):
+                    memory_for_prompt, memory_paths = await asyncio.to_thread(build_llm_context, user_text)
+
+                with span("llm"):
+                    llm_output = await asyncio.to_thread(
+                        get_llm_output,
+                        user_text,
+                        memory_for_prompt,
+                        on_text=reply.on_text,
+                        on_field=reply.on_field,
+                        memory_paths=memory_paths,
+                        cancel_event=turn.cancel_event
+                    )
+        except Exception as e:
+            await deliver(ui, turn, f"AI error: {e}", use_tts)
+            return
+        finally:
+            reply.close()
 
-    history_lines = temp_memory.get_history_for_prompt()
-    if history_lines:
-        memory_for_prompt["recent_conversation"] = history_lines
+        streamed = await reply.wait()
 
-    try:
-        llm_output = await asyncio.to_thread(
-            get_llm_output,
-            user_text,
-            memory_for_prompt
-        )
-    except Exception as e:
-        error_msg = f"AI error: {e}"
-        ui.write_log(f"AI: {error_msg}")
-        if use_tts:
-            speak_with_state(ui, error_msg)
-        else:
-            ui.stop_processing()
+    if llm_output is None or not turn_manager.is_current(turn):
         return
 
     intent = llm_output.get("intent", "chat")
@@ -125,51 +389,56 @@ async def process_user_input(ui: AerisUI, user_text: str, use_tts: bool):
     if memory_update and isinstance(memory_update, dict):
         update_memory(memory_update)
 
-    temp_memory.set_last_ai_response(response)
-
-    final_text = None
-
-    if intent == "open_app":
-        open_app(
-            parameters=parameters,
-            response=response,
-            player=ui,
-            session_memory=temp_memory
-        )
-        final_text = response or f"Opening {parameters.get('app_name','application')}."
+    temp_memory.set_last_user_text(user_text, intent)
+    temp_memory.set_last_ai_response(response, intent)
 
-    elif intent == "weather_report":
-        final_text = weather_action(
-            parameters=parameters,
-            player=ui,
-            session_memory=temp_memory
-        )
+    if streamed and intent in STREAMED_INTENTS:
+        return
 
-    elif intent == "search":
-        final_text = web_search(
-            parameters=parameters,
-            player=ui,
-            session_memory=temp_memory
-        )
+    final_text = None
 
-    elif intent == "send_message":
-        send_message(
-            parameters=parameters,
-            player=ui,
-            session_memory=temp_memory
-        )
-        final_text = response or "Message sent."
+    with span(f"tool.{intent}"):
+        if intent == "open_app":
+            await asyncio.to_thread(
+                open_app,
+                parameters=parameters,
+                response=response,
+                player=ui,
+                session_memory=temp_memory
+            )
+            final_text = response or f"Opening {parameters.get('app_name','application')}."
+
+        elif intent == "weather_report":
+            final_text = await asyncio.to_thread(
+                weather_action,
+                parameters=parameters,
+                player=ui,
+                session_memory=temp_memory
+            )
+
+        elif intent == "search":
+            final_text = await asyncio.to_thread(
+                web_search,
+                parameters=parameters,
+                player=ui,
+                session_memory=temp_memory
+            )
+
+        elif intent == "send_message":
+            await asyncio.to_thread(
+                send_message,
+                parameters=parameters,
+                player=ui,
+                session_memory=temp_memory
+            )
+            final_text = response or "Message sent."
 
-    else:
-        final_text = response
+        else:
+            final_text = response
 
     if final_text and final_text.strip():
-        ui.write_log(f"AI: {final_text}")
-        if use_tts:
-            speak_with_state(ui, final_text)
-        else:
-            ui.stop_processing()
-    else:
+        await deliver(ui, turn, final_text, use_tts)
+    elif turn_manager.is_current(turn):
         ui.write_log("AI: Done.")
         ui.stop_processing()
 
@@ -180,37 +449,53 @@ async def ai_loop(ui: AerisUI):
     MAIN_LOOP = asyncio.get_running_loop()
     ui.set_backend_loop(MAIN_LOOP)
 
+    # Chat mode already works on this loop while the voice model warms up.
+    try:
+        await asyncio.wrap_future(load_model_async())
+        report_startup("voice ready")
+    except Exception as e:
+        print(f"Voice input unavailable: {e}")
+        await asyncio.Event().wait()
+
     while True:
 
         stop_listening_flag.clear()
+        start_trace()
+        wake_stop = threading.Event()
 
         wake_task = asyncio.create_task(
-            asyncio.to_thread(listen_for_wake_word, "aeris")
+            asyncio.to_thread(listen_for_wake_word, "aeris", stop_event=wake_stop)
         )
 
         push_task = asyncio.create_task(
             asyncio.to_thread(ui.push_to_talk_event.wait)
         )
 
-        done, pending = await asyncio.wait(
-            [wake_task, push_task],
-            return_when=asyncio.FIRST_COMPLETED,
-        )
+        with span("wake") as s:
+            done, pending = await asyncio.wait(
+                [wake_task, push_task],
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            s.set(trigger="voice" if wake_task in done else "button")
+
+        push_task.cancel()
 
-        for task in pending:
-            task.cancel()
+        if wake_task in pending:
+            # record_voice() shares the vad, so the wake thread must be
+            # gone, not just told to stop, before it starts.
+            wake_stop.set()
+            await wake_task
 
         if ui.push_to_talk_event.is_set():
             ui.push_to_talk_event.clear()
-            stop_listening_flag.set()
-            await asyncio.sleep(0.1)
-            stop_listening_flag.clear()
 
         ui.start_listening()
 
         stop_listening_flag.clear()
 
-        user_text = await get_voice_input()
+        with span("listen") as s:
+            user_text = await get_voice_input()
+            s.set(chars=len(user_text))
 
         ui.stop_listening()
 
@@ -221,14 +506,25 @@ async def ai_loop(ui: AerisUI):
 
 def main():
 
+    load_model_async()
+    warm_up()
+    prewarm_cache()
+
     ui = AerisUI(size=(1000, 720))
+    ui.on_window_ready = lambda: report_startup("window shown")
+    ui.on_user_message = process_user_input
+    set_level_callback(ui.set_audio_level)
 
     def runner():
         asyncio.run(ai_loop(ui))
 
     threading.Thread(target=runner, daemon=True).start()
 
-    ui.run()
+    try:
+        ui.run()
+    finally:
+        # The window is gone; drop the pooled keep-alive connections.
+        close_session()
 
 
 if __name__ == "__main__":
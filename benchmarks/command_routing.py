@@ -0,0 +1,126 @@
+"""
+Per-turn cost of the pre-LLM keyword routes (interrupt, alarm, aircraft).
+
+    python benchmarks/command_routing.py --utterances 20000
+
+Compares the precompiled CommandMatcher chain with the previous
+substring + difflib.SequenceMatcher checks over a synthetic corpus.
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from intent_router import INTERRUPT_MATCHER, ALARM_MATCHER, INTERRUPT_COMMANDS, ALARM_KEYWORDS, tokenize
+from systems.aircraft_report import DETAILED_COMMANDS, OPEN_COMMANDS, SUMMARY_COMMANDS, AIRCRAFT_KEYWORDS
+
+
+TEMPLATES = [
+    "open {app}", "what's the weather in {city} {day}", "search for {thing}",
+    "send a message to {person} saying {thing}", "how are you doing today",
+    "tell me about {thing}", "set an alarm for {hour} am", "wake me up in {hour} minutes",
+    "how many planes are nearby", "give me aircraft details", "stop", "mute",
+    "what is the best {thing} in {city}", "remind me to call {person} {day}",
+    "where is the nearest bus stop in {city}", "show aircraft map",
+]
+
+SLOTS = {
+    "app": ["spotify", "chrome", "visual studio code", "discord", "steam"],
+    "city": ["paris", "london", "new york", "tokyo", "berlin"],
+    "day": ["today", "tomorrow", "on friday", "tonight"],
+    "thing": ["pizza", "python tutorials", "the election", "cheap flights", "a good movie"],
+    "person": ["dad", "mom", "john", "sarah"],
+    "hour": ["5", "6", "7", "10"],
+}
+
+
+def build_corpus(count: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        template = rng.choice(TEMPLATES)
+        corpus.append(re.sub(r"\{(\w+)\}", lambda m: rng.choice(SLOTS[m.group(1)]), template))
+    return corpus
+
+
+# Previous implementation, kept here only for comparison.
+def _legacy_normalize(text):
+    text = text.lower()
+    text = re.sub(r"[^a-z0-9\s]", "", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _legacy_match(user_input, commands):
+    user = _legacy_normalize(user_input)
+    for command in commands:
+        cmd = _legacy_normalize(command)
+        if cmd in user:
+            return True
+        user_words, cmd_words = set(user.split()), set(cmd.split())
+        if cmd_words and len(user_words & cmd_words) / len(cmd_words) >= 0.6:
+            return True
+        if SequenceMatcher(None, user, cmd).ratio() >= 0.6:
+            return True
+    return False
+
+
+def legacy_route(text):
+    lower = text.lower()
+    if any(cmd in lower for cmd in INTERRUPT_COMMANDS):
+        return "interrupt"
+    if any(k in lower for k in ALARM_KEYWORDS):
+        return "alarm"
+    txt = text.strip().lower()
+    if _legacy_match(txt, ["give me aircraft details", "detailed aircraft report", "full detailed aircraft report"]):
+        return "aircraft"
+    if _legacy_match(txt, ["open aircraft", "open flight radar", "show aircraft map"]):
+        return "aircraft"
+    if _legacy_match(txt, ["planes nearby", "how many aircraft", "how many planes"]):
+        return "aircraft"
+    if any(k in txt for k in ["aircraft", "airplane", "plane", "flight", "air traffic"]):
+        return "aircraft"
+    return None
+
+
+def matcher_route(text):
+    if INTERRUPT_MATCHER(text):
+        return "interrupt"
+    if ALARM_MATCHER(text):
+        return "alarm"
+    words = tokenize(text)
+    if DETAILED_COMMANDS(words) or OPEN_COMMANDS(words) or SUMMARY_COMMANDS(words) or AIRCRAFT_KEYWORDS(words):
+        return "aircraft"
+    return None
+
+
+def measure(route, corpus):
+    routed = {}
+    start = time.perf_counter()
+    for text in corpus:
+        result = route(text)
+        routed[result] = routed.get(result, 0) + 1
+    elapsed = time.perf_counter() - start
+    return elapsed / len(corpus) * 1e6, routed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--utterances", type=int, default=20000)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.utterances)
+
+    for name, route in (("legacy", legacy_route), ("matcher", matcher_route)):
+        per_turn, routed = measure(route, corpus)
+        summary = ", ".join(f"{k or 'llm'}={v}" for k, v in sorted(routed.items(), key=lambda kv: str(kv[0])))
+        print(f"{name:<8} {per_turn:8.2f} us/turn | {summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,672 @@
+"""
+Offline end-to-end turn benchmark: audio in, LLM, tools, audio out.
+
+    python benchmarks/e2e_turns.py --turns 14 --llm-ttfb-ms 400
+    python benchmarks/e2e_turns.py fixtures/*.wav --speed 2
+    python benchmarks/e2e_turns.py --direct
+
+Drives aeris.ai_loop (or process_user_input directly with --direct)
+with fake sounddevice, vosk, edge-tts, soundfile, flet and pyautogui
+modules, and local stub servers standing in for OpenRouter (streaming,
+configurable latency), SerpAPI and OpenSky. Runs headless without a
+microphone, speakers or network; settings, memory, caches and traces go
+to a temporary directory.
+
+A fixture is a 16 kHz mono 16-bit WAV with a "<name>.json" sidecar:
+
+    {"text": "tell me a joke", "wake": true, "speech_end": 2.4,
+     "reply": {"intent": "chat", "text": "..."}}
+
+The fake recognizer "hears" the sidecar text, revealing words as voiced
+audio reaches it, so no Vosk model is needed. "wake": false presses the
+orb (push-to-talk) instead of saying the wake word. "reply" overrides
+the stub LLM's answer. Without fixtures a synthetic corpus is generated.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import types
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+SAMPLE_RATE = 16000
+BLOCK_BYTES = 1600 * 2
+MS_PER_WORD = 250
+TTS_SAMPLE_RATE = 24000
+TTS_MS_PER_CHAR = 60
+
+CORPUS = [
+    {"text": "tell me a joke about robots", "wake": True},
+    {"text": "what is the capital of australia", "wake": False},
+    {"text": "search for python tutorials", "wake": True},
+    {"text": "what's the weather in paris", "wake": True},
+    {"text": "how many planes are nearby", "wake": False},
+    {"text": "who wrote pride and prejudice", "wake": True},
+    {"text": "open spotify", "wake": True},
+]
+
+
+class Bench:
+    """Shared state between the fakes, the stubs and the driver."""
+
+    speed = 1.0
+    llm_ttfb = 0.4
+    llm_tokens_per_s = 60.0
+    serp_latency = 0.3
+    tts_ttfb = 0.15
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.utterance = None
+        self.speech_end_at = None
+        self.first_audio_at = None
+        self.turn_started_at = None
+        self.llm_requests = 0
+        self.serp_requests = 0
+
+
+BENCH = Bench()
+
+
+# ---------------------------------------------------------------- audio fixtures
+
+def voiced(duration: float, f0: float = 140.0) -> np.ndarray:
+    """Harmonic tone with a syllable-rate envelope: low ZCR, clearly above the floor."""
+    t = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+    wave_ = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 5))
+    envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+    return 0.25 * wave_ * envelope
+
+
+def silence(duration: float, rng: np.random.Generator) -> np.ndarray:
+    return rng.normal(0, 0.002, int(duration * SAMPLE_RATE))
+
+
+def to_pcm(samples: np.ndarray) -> bytes:
+    return (np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes()
+
+
+def synthesize_utterance(entry: dict, rng: np.random.Generator) -> dict:
+    parts = [silence(0.5, rng)]
+    if entry.get("wake"):
+        parts += [voiced(0.45, 180.0), silence(0.25, rng)]
+    parts.append(voiced(len(entry["text"].split()) * MS_PER_WORD / 1000))
+    speech_end = sum(len(p) for p in parts) / SAMPLE_RATE
+    parts.append(silence(1.5, rng))
+
+    return {**entry, "pcm": to_pcm(np.concatenate(parts)), "speech_end": speech_end}
+
+
+def load_fixture(path: Path) -> dict:
+    with wave.open(str(path), "rb") as wav:
+        if (wav.getframerate(), wav.getnchannels(), wav.getsampwidth()) != (SAMPLE_RATE, 1, 2):
+            raise ValueError(f"{path.name}: expected 16 kHz mono 16-bit PCM")
+        pcm = wav.readframes(wav.getnframes())
+
+    sidecar = path.with_suffix(".json")
+    if not sidecar.exists():
+        raise ValueError(f"{path.name}: missing {sidecar.name} with the transcript")
+
+    meta = json.loads(sidecar.read_text(encoding="utf-8"))
+    meta.setdefault("wake", True)
+    meta.setdefault("speech_end", len(pcm) / 2 / SAMPLE_RATE)
+    return {**meta, "pcm": pcm}
+
+
+# ---------------------------------------------------------------- fake modules
+
+class FakeMicrophone:
+    """Plays queued PCM in real time (scaled by --speed), low noise otherwise."""
+
+    def __init__(self):
+        self._pending = bytearray()
+        self._speech_end_offset = None
+        self._lock = threading.Lock()
+        self._rng = np.random.default_rng(1)
+
+    def play(self, pcm: bytes, speech_end: float):
+        with self._lock:
+            self._pending = bytearray(pcm)
+            self._speech_end_offset = int(speech_end * SAMPLE_RATE) * 2
+
+    def is_playing(self) -> bool:
+        return bool(self._pending)
+
+    def next_block(self, size: int) -> bytes:
+        with self._lock:
+            if not self._pending:
+                return to_pcm(silence(size / 2 / SAMPLE_RATE, self._rng))
+
+            block = bytes(self._pending[:size])
+            del self._pending[:size]
+
+            if self._speech_end_offset is not None:
+                self._speech_end_offset -= len(block)
+                if self._speech_end_offset <= 0:
+                    self._speech_end_offset = None
+                    BENCH.speech_end_at = time.perf_counter()
+
+        return block.ljust(size, b"\0")
+
+
+MICROPHONE = FakeMicrophone()
+
+
+class FakeRawInputStream:
+    def __init__(self, samplerate, blocksize, dtype, channels, callback):
+        self.blocksize = blocksize
+        self.samplerate = samplerate
+        self.callback = callback
+        self._running = threading.Event()
+
+    def start(self):
+        self._running.set()
+        threading.Thread(target=self._run, name="fake-mic", daemon=True).start()
+
+    def _run(self):
+        interval = self.blocksize / self.samplerate
+        next_at = time.perf_counter()
+        while self._running.is_set():
+            self.callback(MICROPHONE.next_block(self.blocksize * 2), self.blocksize, None, None)
+            next_at += interval / BENCH.speed
+            time.sleep(max(0.0, next_at - time.perf_counter()))
+
+    def close(self):
+        self._running.clear()
+
+    stop = close
+
+
+class FakeOutputStream:
+    def __init__(self, samplerate, channels, dtype):
+        self.samplerate = samplerate
+
+    def start(self):
+        pass
+
+    def write(self, data):
+        with BENCH.lock:
+            if BENCH.first_audio_at is None:
+                BENCH.first_audio_at = time.perf_counter()
+        time.sleep(len(data) / self.samplerate / BENCH.speed)
+
+    def stop(self):
+        pass
+
+    abort = close = stop
+
+
+class FakeRecognizer:
+    """
+    vosk.KaldiRecognizer stand-in. It recognizes the transcript of the
+    utterance being played, one word per MS_PER_WORD of audio it was fed.
+    Grammar recognizers only ever hear their own phrases.
+    """
+
+    def __init__(self, model, samplerate, grammar=None):
+        self.grammar = [g for g in json.loads(grammar) if g != "[unk]"] if grammar else None
+        self.Reset()
+
+    def Reset(self):
+        self.fed_ms = 0.0
+
+    def AcceptWaveform(self, data):
+        self.fed_ms += len(data) / 2 / SAMPLE_RATE * 1000
+        return False
+
+    def _heard(self, final: bool) -> str:
+        utterance = BENCH.utterance
+        if utterance is None:
+            return ""
+
+        if self.grammar is not None:
+            if self.fed_ms < 300:
+                return ""
+            if utterance.get("wake") and "aeris" in self.grammar:
+                return "aeris"
+            text = utterance["text"]
+            return text if text in self.grammar else ""
+
+        words = utterance["text"].split()
+        if not final:
+            words = words[:int(self.fed_ms // MS_PER_WORD)]
+        return " ".join(words)
+
+    def PartialResult(self):
+        return json.dumps({"partial": self._heard(final=False)})
+
+    def Result(self):
+        return json.dumps({"text": self._heard(final=True)})
+
+    def FinalResult(self):
+        text = self._heard(final=True)
+        self.Reset()
+        return json.dumps({"text": text})
+
+
+class FakeCommunicate:
+    def __init__(self, text, voice=None, rate=None, volume=None, pitch=None):
+        self.text = text
+
+    async def stream(self):
+        await asyncio.sleep(BENCH.tts_ttfb / BENCH.speed)
+
+        count = int(len(self.text) * TTS_MS_PER_CHAR / 1000 * TTS_SAMPLE_RATE)
+        t = np.arange(count) / TTS_SAMPLE_RATE
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(TTS_SAMPLE_RATE)
+            wav.writeframes(((0.1 * np.sin(2 * np.pi * 220 * t)) * 32767).astype("<i2").tobytes())
+
+        data = buf.getvalue()
+        for offset in range(0, len(data), 8192):
+            yield {"type": "audio", "data": data[offset:offset + 8192]}
+            await asyncio.sleep(0)
+
+
+def fake_sf_read(file, dtype="float32"):
+    with wave.open(file, "rb") as wav:
+        frames = np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2")
+        return frames.astype(dtype) / 32768.0, wav.getframerate()
+
+
+def _module(name: str, **attrs) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+class _Anything:
+    """Absorbs any attribute access or call (flet, pyautogui)."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        return _Anything()
+
+    def __call__(self, *args, **kwargs):
+        return _Anything()
+
+
+def install_fakes(workdir: Path):
+    sys.modules["sounddevice"] = _module(
+        "sounddevice", RawInputStream=FakeRawInputStream, OutputStream=FakeOutputStream
+    )
+    sys.modules["vosk"] = _module("vosk", Model=lambda path: object(), KaldiRecognizer=FakeRecognizer)
+    sys.modules["edge_tts"] = _module("edge_tts", Communicate=FakeCommunicate)
+    sys.modules["pyautogui"] = _module("pyautogui", __getattr__=lambda name: _Anything())
+    sys.modules["flet"] = _module("flet", __getattr__=lambda name: _Anything)
+    sys.modules["bootstrap"] = _module("bootstrap", bootstrap=lambda: None)
+
+    try:
+        import soundfile  # noqa: F401  real decoder handles the WAV bytes
+    except ImportError:
+        sys.modules["soundfile"] = _module("soundfile", read=fake_sf_read)
+
+    import webbrowser
+    webbrowser.open = lambda *args, **kwargs: True
+
+    os.environ["AERIS_TRACE"] = "1"
+    os.environ["AERIS_TRACE_RESOURCES"] = "1"
+    os.environ["AERIS_TRACE_PATH"] = str(workdir / "traces.jsonl")
+
+
+# ---------------------------------------------------------------- stub servers
+
+def default_reply(text: str) -> dict:
+    return {
+        "intent": "chat",
+        "parameters": {},
+        "needs_clarification": False,
+        "text": f"Here is a short answer about {text}. I hope that helps, sir.",
+        "memory_update": {},
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        with BENCH.lock:
+            BENCH.llm_requests += 1
+
+        last = payload["messages"][-1]["content"]
+        match = re.search(r'User message: "(.*)"', last, re.S)
+        text = match.group(1) if match else last
+
+        utterance = BENCH.utterance or {}
+        reply = utterance.get("reply") if utterance.get("text") == text else None
+        content = json.dumps(reply or default_reply(text))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        time.sleep(BENCH.llm_ttfb)
+
+        try:
+            for offset in range(0, len(content), 4):
+                delta = {"choices": [{"delta": {"content": content[offset:offset + 4]}}]}
+                self._chunk(f"data: {json.dumps(delta)}\n\n")
+                time.sleep(1 / BENCH.llm_tokens_per_s)
+            self._chunk("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # cancelled turn closed the stream
+
+    def _chunk(self, text: str):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.startswith("/search.json"):
+            with BENCH.lock:
+                BENCH.serp_requests += 1
+            time.sleep(BENCH.serp_latency)
+            body = {"news_results": [
+                {
+                    "title": f"Stub headline number {i} about the query",
+                    "snippet": "A reasonably long snippet describing what happened in this made up story.",
+                }
+                for i in range(5)
+            ]}
+        elif self.path.startswith("/opensky/states"):
+            body = {"states": [
+                ["abc123", "TEST1 ", "Nowhere", 0, 0, -73.3, 40.8, 0, False, 220.0, 90.0]
+            ]}
+        else:
+            body = []
+
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server() -> str:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# ---------------------------------------------------------------- headless app
+
+class HeadlessUI:
+    """The parts of AerisUI the backend calls, without a window."""
+
+    def __init__(self):
+        self.push_to_talk_event = threading.Event()
+        self.backend_loop = None
+        self.on_window_ready = None
+        self.state = "idle"
+        self.log = []
+
+    def set_backend_loop(self, loop):
+        self.backend_loop = loop
+
+    def write_log(self, text):
+        self.log.append(text)
+
+    def show_chat_loading(self): pass
+    def remove_chat_loading(self): pass
+    def append_ai_typing(self, full_text, speed=0.02): pass
+    def set_audio_level(self, level): pass
+
+    def start_listening(self): self.state = "listening"
+    def stop_listening(self): self.state = "idle"
+    def start_processing(self): self.state = "processing"
+    def stop_processing(self): self.state = "idle"
+    def start_speaking(self): self.state = "speaking"
+    def stop_speaking(self): self.state = "idle"
+
+
+def configure_app(workdir: Path, base_url: str):
+    """Imports the app against the fakes and points every path and URL at the sandbox."""
+    import brain
+    import tts
+    import voice_input
+    from memory import config_manager, fact_store, memory_manager, response_cache
+    from systems import aircraft_report, internet_search
+
+    keys = workdir / "keys.json"
+    keys.write_text(json.dumps({"openrouter_api_key": "stub", "serpapi_api_key": "stub"}))
+    config_manager.api_keys.path = keys
+
+    memory_manager.MEMORY_PATH = workdir / "memory.json"
+    memory_manager.JOURNAL_PATH = workdir / "memory.journal"
+    fact_store.fact_store.path = workdir / "facts.db"
+    response_cache.response_cache.path = workdir / "response_cache.db"
+    tts.phrase_cache = tts.PhraseCache(workdir / "tts", tts.CACHE_MAX_BYTES)
+
+    brain.OPENROUTER_URL = f"{base_url}/api/v1/chat/completions"
+    internet_search.SERPAPI_URL = f"{base_url}/search.json"
+    aircraft_report.OPENSKY_STATES = f"{base_url}/opensky/states"
+    aircraft_report.OPENSKY_FLIGHTS = f"{base_url}/opensky/flights"
+
+    (workdir / "model").mkdir(exist_ok=True)
+    voice_input.MODEL_PATH = workdir / "model"
+
+    import aeris
+    return aeris
+
+
+# ---------------------------------------------------------------- drivers
+
+def new_turn(utterance: dict):
+    with BENCH.lock:
+        BENCH.utterance = utterance
+        BENCH.speech_end_at = None
+        BENCH.first_audio_at = None
+        BENCH.turn_started_at = None
+
+
+def finish_turn(utterance: dict, heard: str | None, timed_out: bool) -> dict:
+    start = BENCH.speech_end_at or BENCH.turn_started_at
+    first_audio = BENCH.first_audio_at
+    return {
+        "text": utterance["text"],
+        "heard": heard,
+        "timed_out": timed_out,
+        "e2e_ms": (first_audio - start) * 1000 if first_audio and start else None,
+    }
+
+
+async def drive_loop(aeris, ui: HeadlessUI, utterances: list[dict], timeout: float) -> list[dict]:
+    done = asyncio.Event()
+    heard = {}
+    original = aeris.process_user_input
+
+    async def instrumented(ui_, user_text, use_tts):
+        BENCH.turn_started_at = BENCH.turn_started_at or time.perf_counter()
+        heard["text"] = user_text
+        try:
+            await original(ui_, user_text, use_tts)
+        finally:
+            done.set()
+
+    aeris.process_user_input = instrumented
+    loop_task = asyncio.create_task(aeris.ai_loop(ui))
+    results = []
+
+    await asyncio.sleep(1.0 / BENCH.speed)
+
+    for utterance in utterances:
+        new_turn(utterance)
+        done.clear()
+        heard.clear()
+
+        if utterance.get("wake"):
+            MICROPHONE.play(utterance["pcm"], utterance["speech_end"])
+        else:
+            ui.push_to_talk_event.set()
+            while ui.state != "listening":
+                await asyncio.sleep(0.01)
+            MICROPHONE.play(utterance["pcm"], utterance["speech_end"])
+
+        try:
+            await asyncio.wait_for(done.wait(), timeout)
+            timed_out = False
+        except asyncio.TimeoutError:
+            timed_out = True
+
+        results.append(finish_turn(utterance, heard.get("text"), timed_out))
+        print(f"  {utterance['text']!r:<40} heard {heard.get('text')!r}")
+
+        while MICROPHONE.is_playing():
+            await asyncio.sleep(0.02)
+        await asyncio.sleep(0.3 / BENCH.speed)
+
+    loop_task.cancel()
+    await asyncio.gather(loop_task, return_exceptions=True)
+
+    # Release the wake-word and push-to-talk waiter threads.
+    import voice_input
+    voice_input.stop_listening_flag.set()
+    ui.push_to_talk_event.set()
+    return results
+
+
+async def drive_direct(aeris, ui: HeadlessUI, utterances: list[dict], timeout: float) -> list[dict]:
+    ui.set_backend_loop(asyncio.get_running_loop())
+    results = []
+
+    for utterance in utterances:
+        new_turn(utterance)
+        BENCH.turn_started_at = time.perf_counter()
+
+        try:
+            await asyncio.wait_for(aeris.process_user_input(ui, utterance["text"], use_tts=True), timeout)
+            timed_out = False
+        except asyncio.TimeoutError:
+            timed_out = True
+
+        results.append(finish_turn(utterance, utterance["text"], timed_out))
+
+    return results
+
+
+# ---------------------------------------------------------------- report
+
+def percentiles(values: list[float]) -> str:
+    if not values:
+        return "n/a"
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, round(q * (len(values) - 1)))]
+    return f"p50 {pick(0.5):8.1f}  p95 {pick(0.95):8.1f}  p99 {pick(0.99):8.1f}  max {values[-1]:8.1f} ms"
+
+
+def report(results: list[dict], spans: list[dict], wall: float, cpu: float):
+    import tracing
+
+    e2e = [r["e2e_ms"] for r in results if r["e2e_ms"] is not None]
+    heard_ok = sum(r["heard"] == r["text"] for r in results)
+    timeouts = sum(r["timed_out"] for r in results)
+
+    print(f"\nturns {len(results)}, transcripts matched {heard_ok}, timeouts {timeouts}")
+    print(f"LLM requests {BENCH.llm_requests}, SerpAPI requests {BENCH.serp_requests}")
+    print(f"speech end -> first audio  {percentiles(e2e)}")
+
+    by_span = {}
+    for rec in spans:
+        by_span.setdefault(rec["span"], []).append(rec)
+
+    print(f"\n{'stage':<20}{'count':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'cpu ms':>10}{'peak MB':>10}")
+    for name, recs in sorted(by_span.items()):
+        durations = sorted(r["duration_ms"] for r in recs)
+        pick = lambda q: durations[min(len(durations) - 1, round(q * (len(durations) - 1)))]
+        cpu_ms = [r["cpu_ms"] for r in recs if "cpu_ms" in r]
+        rss = [r["peak_rss_kb"] for r in recs if r.get("peak_rss_kb")]
+        print(
+            f"{name:<20}{len(recs):>6}{pick(0.5):>10.1f}{pick(0.95):>10.1f}{pick(0.99):>10.1f}"
+            f"{(sum(cpu_ms) / len(cpu_ms) if cpu_ms else 0):>10.1f}"
+            f"{(max(rss) / 1024 if rss else 0):>10.1f}"
+        )
+
+    peak = tracing.peak_rss_kb()
+    print(f"\nwall {wall:.1f} s, process CPU {cpu:.1f} s, peak RSS {peak / 1024 if peak else 0:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("fixtures", nargs="*", type=Path)
+    parser.add_argument("--turns", type=int, default=None, help="cycle the corpus to this many turns")
+    parser.add_argument("--direct", action="store_true", help="call process_user_input, skip audio and ASR")
+    parser.add_argument("--speed", type=float, default=1.0, help="audio clock multiplier")
+    parser.add_argument("--llm-ttfb-ms", type=float, default=400)
+    parser.add_argument("--llm-tokens-per-s", type=float, default=60)
+    parser.add_argument("--serp-latency-ms", type=float, default=300)
+    parser.add_argument("--tts-ttfb-ms", type=float, default=150)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    BENCH.speed = args.speed
+    BENCH.llm_ttfb = args.llm_ttfb_ms / 1000
+    BENCH.llm_tokens_per_s = args.llm_tokens_per_s
+    BENCH.serp_latency = args.serp_latency_ms / 1000
+    BENCH.tts_ttfb = args.tts_ttfb_ms / 1000
+
+    workdir = Path(tempfile.mkdtemp(prefix="aeris-bench-"))
+    install_fakes(workdir)
+    base_url = start_stub_server()
+    aeris = configure_app(workdir, base_url)
+
+    import tracing
+    spans = []
+    tracing.subscribe(spans.append)
+
+    rng = np.random.default_rng(args.seed)
+    if args.fixtures:
+        utterances = [load_fixture(path) for path in args.fixtures]
+    else:
+        utterances = [synthesize_utterance(entry, rng) for entry in CORPUS]
+
+    if args.turns:
+        utterances = [utterances[i % len(utterances)] for i in range(args.turns)]
+
+    ui = HeadlessUI()
+    driver = drive_direct if args.direct else drive_loop
+
+    print(f"{len(utterances)} turns, sandbox {workdir}")
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    results = asyncio.run(driver(aeris, ui, utterances, args.timeout))
+
+    report(results, spans, time.perf_counter() - wall_start, time.process_time() - cpu_start)
+    aeris.prefetcher.report()
+
+
+if __name__ == "__main__":
+    main()
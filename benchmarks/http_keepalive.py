@@ -0,0 +1,101 @@
+"""
+Micro-benchmark: fresh connection per request vs the pooled keep-alive session.
+
+Runs a local stub server, no network needed:
+
+    python benchmarks/http_keepalive.py --requests 200 --handshake-ms 40
+
+--handshake-ms delays every newly accepted connection to stand in for the
+TCP + TLS handshake you pay against a real remote host.
+"""
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from http_client import create_session
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    handshake_delay = 0.0
+    connections = 0
+
+    def get_request(self):
+        request = super().get_request()
+        self.connections += 1
+        if self.handshake_delay:
+            time.sleep(self.handshake_delay)
+        return request
+
+
+def run(label, fetch, url, count):
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        fetch(url, timeout=5).content
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    print(
+        f"{label:<12} mean {statistics.mean(timings):7.2f} ms | "
+        f"p50 {timings[len(timings) // 2]:7.2f} ms | "
+        f"p95 {timings[int(len(timings) * 0.95) - 1]:7.2f} ms"
+    )
+    return statistics.mean(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--handshake-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StubServer(("127.0.0.1", 0), StubHandler)
+    server.handshake_delay = args.handshake_ms / 1000
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    before = server.connections
+    fresh = run("fresh", requests.get, url, args.requests)
+    fresh_conns = server.connections - before
+
+    session = create_session()
+    before = server.connections
+    pooled = run("pooled", session.get, url, args.requests)
+    pooled_conns = server.connections - before
+
+    print(f"connections: fresh {fresh_conns}, pooled {pooled_conns}")
+    print(f"saved per request: {fresh - pooled:.2f} ms")
+
+    session.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
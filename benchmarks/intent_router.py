@@ -0,0 +1,80 @@
+"""
+Local intent router benchmark: accuracy and latency per route.
+
+    python benchmarks/intent_router.py [--corpus benchmarks/intent_corpus.jsonl]
+
+Each corpus line is {"text", "intent", "parameters"}; "intent": null means
+the turn must fall through to the LLM.
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+
+from intent_router import route_intent, get_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", type=Path, default=HERE / "intent_corpus.jsonl")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    cases = [
+        json.loads(line)
+        for line in args.corpus.read_text(encoding="utf-8").splitlines()
+        if line.strip()
+    ]
+
+    get_model()
+
+    stats = defaultdict(lambda: {"total": 0, "correct": 0, "timings": []})
+    failures = []
+
+    for case in cases:
+        expected = case.get("intent")
+        route = expected or "llm"
+
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            output = route_intent(case["text"])
+            timings.append((time.perf_counter() - start) * 1e6)
+
+        got = output["intent"] if output else None
+        correct = got == expected and (
+            output is None or output["parameters"] == case.get("parameters")
+        )
+
+        entry = stats[route]
+        entry["total"] += 1
+        entry["correct"] += correct
+        entry["timings"].append(sorted(timings)[len(timings) // 2])
+
+        if not correct:
+            failures.append((case["text"], expected, output))
+
+    print(f"{'route':<16}{'accuracy':>12}{'p50 us':>10}{'max us':>10}")
+    for route, entry in sorted(stats.items()):
+        timings = sorted(entry["timings"])
+        print(
+            f"{route:<16}{entry['correct']:>6}/{entry['total']:<5}"
+            f"{timings[len(timings) // 2]:>10.1f}{timings[-1]:>10.1f}"
+        )
+
+    total = sum(e["total"] for e in stats.values())
+    correct = sum(e["correct"] for e in stats.values())
+    print(f"\noverall accuracy {correct}/{total} ({correct / total * 100:.1f}%)")
+
+    for text, expected, output in failures:
+        print(f"  miss: {text!r} expected {expected}, got {output and output['intent']} {output and output['parameters']}")
+
+
+if __name__ == "__main__":
+    main()
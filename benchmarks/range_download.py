@@ -0,0 +1,251 @@
+"""
+Checks bootstrap's ranged model download against a local file server.
+
+    python benchmarks/range_download.py --size-mb 8 --parts 4
+
+Serves a small model-like zip with ETag/Last-Modified and Range support,
+no network needed, and runs download_with_progress, verify_archive and
+extract_model through the cases that matter for a resumed download: a
+clean run, resuming after an interrupted part, the file changing between
+runs (stale parts must be discarded), a server that refuses HEAD, and one
+without range support. Every case must end with a byte-identical archive
+that verifies and extracts to the same files. A corrupted archive must be
+rejected by verify_archive.
+"""
+
+import argparse
+import hashlib
+import io
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import bootstrap
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _headers(self, status, length, extra=()):
+        server = self.server
+        self.send_response(status)
+        self.send_header("Content-Length", str(length))
+        if server.ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", f'"{server.etag}"')
+        self.send_header("Last-Modified", server.modified)
+        for name, value in extra:
+            self.send_header(name, value)
+        self.end_headers()
+
+    def do_HEAD(self):
+        if self.server.refuse_head:
+            self.send_error(405)
+            return
+        self._headers(200, len(self.server.body))
+
+    def do_GET(self):
+        server = self.server
+        body = server.body
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        fresh = if_range in (None, f'"{server.etag}"', server.modified)
+
+        if not (server.ranges and match and fresh):
+            self._headers(200, len(body))
+            self.wfile.write(body)
+            return
+
+        start = int(match.group(1))
+        end = int(match.group(2) or len(body) - 1)
+        chunk = body[start:end + 1]
+
+        # Cut the first range short once, like a dropped connection.
+        if server.drop_after and start == 0:
+            server.drop_after, limit = 0, server.drop_after
+            self._headers(206, len(chunk), [("Content-Range", f"bytes {start}-{end}/{len(body)}")])
+            self.wfile.write(chunk[:limit])
+            self.close_connection = True
+            return
+
+        server.ranged += 1
+        self._headers(206, len(chunk), [("Content-Range", f"bytes {start}-{end}/{len(body)}")])
+        self.wfile.write(chunk)
+
+    def log_message(self, *args):
+        pass
+
+
+class RangeServer(ThreadingHTTPServer):
+    daemon_threads = True
+    ranges = True
+    refuse_head = False
+    drop_after = 0
+    ranged = 0
+
+    def publish(self, size, corrupt=False):
+        self.members = model_members(size)
+        self.body = build_zip(self.members)
+        if corrupt:
+            # Flip a byte inside the first member's data.
+            offset = len(self.body) // 4
+            self.body = self.body[:offset] + bytes([self.body[offset] ^ 0xFF]) + self.body[offset + 1:]
+        self.etag = hashlib.sha256(self.body).hexdigest()[:16]
+        self.modified = formatdate(time.time(), usegmt=True)
+        return hashlib.sha256(self.body).hexdigest()
+
+
+def model_members(size):
+    """Files laid out like a Vosk model, random (incompressible) data."""
+    names = ["am/final.mdl", "graph/HCLr.fst", "graph/Gr.fst", "conf/model.conf", "README"]
+    weights = [0.5, 0.3, 0.18, 0.01, 0.01]
+    return {
+        f"model/{name}": os.urandom(max(16, int(size * weight)))
+        for name, weight in zip(names, weights)
+    }
+
+
+def build_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buffer.getvalue()
+
+
+def sha256_of(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def check_archive(path, expected, members, target):
+    """Runs bootstrap's verify and extract steps on the downloaded archive."""
+    if sha256_of(path) != expected:
+        return "CORRUPT download"
+
+    try:
+        bootstrap.verify_archive(path, expected)
+    except RuntimeError as e:
+        return f"rejected by verify_archive ({e})"
+
+    bootstrap.extract_model(path, target)
+    for name, data in members.items():
+        extracted = target / Path(name).relative_to("model")
+        if not extracted.is_file() or extracted.read_bytes() != data:
+            return f"extract mismatch at {name}"
+
+    if any(p.name.startswith(".extract-") for p in target.parent.iterdir()):
+        return "extract left a temporary folder behind"
+    return None
+
+
+def run_case(label, server, url, workdir, size, parts, setup=None, corrupt=False):
+    slug = label.replace(" ", "-")
+    destination = workdir / f"{slug}.zip"
+    expected = server.publish(size, corrupt)
+    server.ranged = 0
+
+    if setup:
+        setup(server, destination, expected)
+
+    start = time.perf_counter()
+    retried = None
+    try:
+        bootstrap.download_with_progress(url, destination, parts=parts)
+    except Exception as e:
+        # A failed run leaves its parts for the next one to resume.
+        retried = e
+        try:
+            bootstrap.download_with_progress(url, destination, parts=parts)
+        except Exception as retry_error:
+            retried = retry_error
+            destination.unlink(missing_ok=True)
+
+    if not destination.exists():
+        ok, outcome = False, f"FAILED ({retried})"
+    else:
+        problem = check_archive(destination, expected, server.members, workdir / f"{slug}-model")
+        if corrupt:
+            ok = bool(problem and problem.startswith("rejected"))
+            outcome = problem if ok else f"corrupt archive ACCEPTED ({problem})"
+        else:
+            ok = problem is None
+            outcome = problem or "ok, verified and extracted"
+        if retried is not None and ok:
+            outcome = f"{outcome} after retry ({retried})"
+    elapsed = (time.perf_counter() - start) * 1000
+
+    leftovers = sorted(p.name for p in workdir.glob(f"{destination.name}.*"))
+    if leftovers:
+        ok, outcome = False, f"{outcome}, leftovers {leftovers}"
+
+    print(f"\n{label:<16} {elapsed:8.1f} ms | ranged requests {server.ranged:3d} | {outcome}")
+    return ok
+
+
+def stale_parts(server, destination, expected):
+    # Parts and info from an earlier run of a different file.
+    step = len(server.body) // 4
+    old = os.urandom(step)
+    for i in range(2):
+        destination.with_name(f"{destination.name}.part{i}").write_bytes(old)
+    destination.with_name(f"{destination.name}.parts.json").write_text(
+        f'{{"size": {len(server.body)}, "validator": "\\"outdated\\""}}', encoding="utf-8"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=8)
+    parser.add_argument("--parts", type=int, default=bootstrap.DOWNLOAD_PARTS)
+    args = parser.parse_args()
+
+    size = int(args.size_mb * 1024 * 1024)
+    server = RangeServer(("127.0.0.1", 0), RangeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/model.zip"
+
+    def interrupted(server, destination, expected):
+        server.drop_after = size // args.parts // 3
+
+    def no_head(server, destination, expected):
+        server.refuse_head = True
+
+    def no_ranges(server, destination, expected):
+        server.refuse_head = False
+        server.ranges = False
+
+    def defaults(server, destination, expected):
+        server.refuse_head = False
+        server.ranges = True
+
+    cases = [
+        ("clean", None, False),
+        ("resume", interrupted, False),
+        ("stale parts", stale_parts, False),
+        ("head refused", no_head, False),
+        ("no ranges", no_ranges, False),
+        ("corrupt archive", defaults, True),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [
+            run_case(label, server, url, Path(tmp), size, args.parts, setup, corrupt)
+            for label, setup, corrupt in cases
+        ]
+
+    server.shutdown()
+    print(f"\n{sum(results)}/{len(results)} cases passed")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Wake-word benchmark: full-vocabulary recognizer vs grammar + partial results.
+
+    python benchmarks/wake_word.py fixtures/*.wav
+
+Fixtures must be 16 kHz mono 16-bit WAV files. An optional sidecar
+"<name>.json" with {"wake_end": <seconds>} marks where the wake word ends
+in the recording; detection latency is measured from that point.
+"""
+
+import argparse
+import json
+import sys
+import time
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import voice_input
+
+
+MODES = {
+    "full-vocab": {"grammar": False, "partial": False},
+    "grammar": {"grammar": True, "partial": True},
+}
+
+
+def load_fixture(path: Path):
+    with wave.open(str(path), "rb") as wav:
+        if (wav.getframerate(), wav.getnchannels(), wav.getsampwidth()) != (voice_input.SAMPLE_RATE, 1, 2):
+            raise ValueError(f"{path.name}: expected 16 kHz mono 16-bit PCM")
+        frames = wav.readframes(wav.getnframes())
+
+    wake_end = None
+    sidecar = path.with_suffix(".json")
+    if sidecar.exists():
+        wake_end = json.loads(sidecar.read_text(encoding="utf-8")).get("wake_end")
+
+    return frames, wake_end
+
+
+def run_mode(frames: bytes, grammar: bool, partial: bool):
+    rec = voice_input.create_wake_recognizer(grammar=grammar)
+    block_bytes = voice_input.BLOCK_SIZE * 2
+    bytes_per_second = voice_input.SAMPLE_RATE * 2
+
+    detected_at = None
+    cpu_start = time.process_time()
+
+    for offset in range(0, len(frames), block_bytes):
+        block = frames[offset:offset + block_bytes]
+        if voice_input.wake_word_in_block(rec, block, partial=partial):
+            detected_at = (offset + len(block)) / bytes_per_second
+            break
+
+    if detected_at is None:
+        final = json.loads(rec.FinalResult()).get("text", "").replace("[unk]", " ")
+        if any(alias in final for alias in voice_input.WAKE_ALIASES):
+            detected_at = len(frames) / bytes_per_second
+
+    cpu = time.process_time() - cpu_start
+    processed = (offset + len(block)) / bytes_per_second if frames else 0
+
+    return cpu, processed, detected_at
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("fixtures", nargs="+", type=Path)
+    args = parser.parse_args()
+
+    totals = {name: {"cpu": 0.0, "audio": 0.0, "latency": [], "hits": 0} for name in MODES}
+
+    for path in args.fixtures:
+        frames, wake_end = load_fixture(path)
+
+        for name, options in MODES.items():
+            cpu, audio, detected_at = run_mode(frames, **options)
+            total = totals[name]
+            total["cpu"] += cpu
+            total["audio"] += audio
+
+            if detected_at is not None:
+                total["hits"] += 1
+                if wake_end is not None:
+                    total["latency"].append(detected_at - wake_end)
+
+            shown = f"{detected_at:.2f}s" if detected_at is not None else "missed"
+            print(f"{path.name:<28} {name:<11} cpu {cpu * 1000:8.1f} ms  detected {shown}")
+
+    print()
+    for name, total in totals.items():
+        per_second = total["cpu"] / total["audio"] * 1000 if total["audio"] else 0
+        latency = total["latency"]
+        mean_latency = f"{sum(latency) / len(latency) * 1000:.0f} ms" if latency else "n/a"
+        print(
+            f"{name:<11} cpu/audio-s {per_second:6.1f} ms | "
+            f"detected {total['hits']}/{len(args.fixtures)} | "
+            f"mean latency after wake word {mean_latency}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,22 @@
 import sys
+import json
+import site
+import sysconfig
 import subprocess
 import importlib
+import importlib.util
+import importlib.metadata
 from pathlib import Path
+import urllib.error
 import urllib.request
 import zipfile
 import shutil
+import hashlib
+import tempfile
+import threading
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 
 
@@ -17,6 +27,16 @@ MODEL_NAME = "vosk-model-small-en-us-0.15"
 MODEL_URL = "https://alphacephei.com/vosk/models/vosk-model-small-en-us-0.15.zip"
 MODEL_PATH = BASE_DIR / MODEL_NAME
 
+# The archive is fetched in parallel ranges and resumed after interruption.
+DOWNLOAD_PARTS = 4
+CHUNK_SIZE = 256 * 1024
+
+# Optional SHA-256 of the archive. Without it the first download is only
+# checked for zip CRC errors, not authenticity; its digest is recorded in
+# MODEL_PIN_PATH and any later download of the model has to match it.
+MODEL_SHA256 = os.getenv("AERIS_MODEL_SHA256")
+MODEL_PIN_PATH = SETTINGS_DIR / "model.sha256"
+
 
 
 REQUIRED_PACKAGES = [
@@ -24,16 +44,24 @@ REQUIRED_PACKAGES = [
     "sounddevice",
     "edge-tts",
     "soundfile",
-    "serpapi",
+    "numpy",
     "pyautogui",
     "flet",
     "httpx",
-    "google-search-results",
     "Pillow",
     "requests",
     "winotify",
 ]
 
+# Distribution name -> module it provides, where they differ.
+IMPORT_NAMES = {
+    "edge-tts": "edge_tts",
+    "Pillow": "PIL",
+}
+
+# Remembers a verified environment so warm starts skip the checks.
+MANIFEST_PATH = SETTINGS_DIR / "environment.json"
+
 
 
 def progress_bar(current, total, prefix=""):
@@ -59,71 +87,367 @@ def install_package(package):
     )
 
 
+def _site_dirs() -> list[str]:
+    paths = sysconfig.get_paths()
+    dirs = {paths["purelib"], paths["platlib"]}
+
+    try:
+        dirs.add(site.getusersitepackages())
+    except Exception:
+        pass
+
+    return sorted(d for d in dirs if os.path.isdir(d))
+
+
+def _environment_fingerprint() -> dict:
+    # Installing or removing a distribution adds/removes a *.dist-info
+    # folder, which bumps the mtime of the site directory holding it.
+    return {
+        "executable": sys.executable,
+        "version": sys.version,
+        "required": sorted(REQUIRED_PACKAGES),
+        "site_dirs": {d: os.stat(d).st_mtime_ns for d in _site_dirs()},
+    }
+
+
+def manifest_is_current() -> bool:
+    try:
+        manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except Exception:
+        return False
+
+    return manifest.get("fingerprint") == _environment_fingerprint()
+
+
+def write_manifest() -> None:
+    versions = {}
+    for package in REQUIRED_PACKAGES:
+        try:
+            versions[package] = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            versions[package] = None
+
+    manifest = {
+        "fingerprint": _environment_fingerprint(),
+        "packages": versions,
+    }
+
+    try:
+        SETTINGS_DIR.mkdir(exist_ok=True)
+        tmp = MANIFEST_PATH.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        os.replace(tmp, MANIFEST_PATH)
+    except Exception as e:
+        print(f"Could not write environment manifest: {e}")
+
+
+def is_installed(package: str) -> bool:
+    try:
+        importlib.metadata.distribution(package)
+    except importlib.metadata.PackageNotFoundError:
+        return False
+
+    module_name = IMPORT_NAMES.get(package, package.replace("-", "_"))
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
 def ensure_packages():
+    if manifest_is_current():
+        print("Dependencies unchanged since last check.\n")
+        return
+
     print("Checking dependencies...\n")
 
     total = len(REQUIRED_PACKAGES)
     installed = 0
 
     for i, package in enumerate(REQUIRED_PACKAGES, start=1):
-        module_name = package.replace("-", "_")
-        try:
-            importlib.import_module(module_name)
-        except ImportError:
+        if not is_installed(package):
             install_package(package)
+            importlib.invalidate_caches()
 
         installed += 1
         progress_bar(installed, total, prefix="Dependencies")
 
+    write_manifest()
+
     print("\nAll dependencies ready.\n")
 
 
 
-def download_with_progress(url, destination):
+class _Progress:
+    def __init__(self, total, prefix):
+        self.total = total
+        self.prefix = prefix
+        self.done = 0
+        self._lock = threading.Lock()
 
-    def reporthook(block_num, block_size, total_size):
-        downloaded = block_num * block_size
-        if total_size > 0:
-            progress_bar(downloaded, total_size, prefix="Downloading model")
+    def add(self, amount):
+        with self._lock:
+            self.done += amount
+            if self.total > 0:
+                progress_bar(min(self.done, self.total), self.total, prefix=self.prefix)
 
-    urllib.request.urlretrieve(url, destination, reporthook)
 
+def _validator(headers):
+    """The strongest cache validator the server gave, for If-Range."""
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
 
 
-def download_model():
-    zip_path = BASE_DIR / f"{MODEL_NAME}.zip"
+def _probe(url):
+    """
+    Returns (size, ranges, validator) for url. Servers that refuse HEAD
+    are asked for the first byte with a plain GET instead.
+    """
+    try:
+        request = urllib.request.Request(url, method="HEAD")
+        with urllib.request.urlopen(request, timeout=30) as response:
+            size = int(response.headers.get("Content-Length") or 0)
+            ranges = response.headers.get("Accept-Ranges", "").lower() == "bytes"
+            return size, ranges, _validator(response.headers)
+    except urllib.error.HTTPError:
+        pass
+
+    request = urllib.request.Request(url, headers={"Range": "bytes=0-0"})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        if response.status == 206:
+            total = response.headers.get("Content-Range", "").rpartition("/")[2]
+            size = int(total) if total.isdigit() else 0
+            return size, bool(size), _validator(response.headers)
+
+        size = int(response.headers.get("Content-Length") or 0)
+        return size, False, _validator(response.headers)
+
+
+def _reset_parts(destination, size, validator):
+    """
+    Keeps part files from an earlier run only if they belong to the same
+    remote file (same size and validator); otherwise they are discarded.
+    Without a validator there is nothing to check, so nothing is resumed.
+    """
+    info_path = destination.with_name(f"{destination.name}.parts.json")
+    info = {"size": size, "validator": validator}
 
-    print("Vosk model not found.\n")
+    try:
+        previous = json.loads(info_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        previous = None
+
+    if previous != info or not validator:
+        for path in destination.parent.glob(f"{destination.name}.part[0-9]*"):
+            path.unlink(missing_ok=True)
+
+    info_path.write_text(json.dumps(info), encoding="utf-8")
+    return info_path
+
+
+def _download_range(url, part_path, start, end, progress, validator=None):
+    """
+    Downloads bytes start..end (inclusive) into part_path,
+    continuing from whatever an earlier attempt already wrote.
+    """
+    expected = end - start + 1
+    have = part_path.stat().st_size if part_path.exists() else 0
 
+    if have > expected:
+        part_path.unlink()
+        have = 0
+
+    progress.add(have)
+    if have == expected:
+        return
+
+    headers = {"Range": f"bytes={start + have}-{end}"}
+    if validator:
+        headers["If-Range"] = validator
+    request = urllib.request.Request(url, headers=headers)
+
+    with urllib.request.urlopen(request, timeout=60) as response:
+        if response.status != 206:
+            # Also what If-Range answers when the file changed under us.
+            part_path.unlink(missing_ok=True)
+            raise RuntimeError("server ignored the range request")
+
+        with open(part_path, "ab") as f:
+            while True:
+                chunk = response.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                f.write(chunk)
+                progress.add(len(chunk))
+
+    if part_path.stat().st_size != expected:
+        raise RuntimeError(f"{part_path.name} is incomplete")
+
+
+def _download_single(url, destination, progress):
+    with urllib.request.urlopen(url, timeout=60) as response, open(destination, "wb") as f:
+        while True:
+            chunk = response.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            f.write(chunk)
+            progress.add(len(chunk))
+
+
+def download_with_progress(url, destination, parts=DOWNLOAD_PARTS):
+    """
+    Downloads url into destination with parallel ranged requests.
+    Part files are kept on failure, so the next run resumes them
+    as long as the remote file is unchanged.
+    Falls back to a single stream if the server can't serve ranges.
+    """
+    destination = Path(destination)
+    size, ranges, validator = _probe(url)
+    progress = _Progress(size, "Downloading model")
+
+    if not size or not ranges:
+        _download_single(url, destination, progress)
+        return
+
+    parts = max(1, min(parts, size // CHUNK_SIZE or 1))
+    step = size // parts
+    spans = [
+        (i * step, size - 1 if i == parts - 1 else (i + 1) * step - 1)
+        for i in range(parts)
+    ]
+    part_paths = [destination.with_name(f"{destination.name}.part{i}") for i in range(parts)]
+    info_path = _reset_parts(destination, size, validator)
+
+    with ThreadPoolExecutor(max_workers=parts) as pool:
+        futures = [
+            pool.submit(_download_range, url, path, start, end, progress, validator)
+            for path, (start, end) in zip(part_paths, spans)
+        ]
+        for future in futures:
+            future.result()
+
+    tmp = destination.with_name(f"{destination.name}.tmp")
+    with open(tmp, "wb") as out:
+        for path in part_paths:
+            with open(path, "rb") as part:
+                shutil.copyfileobj(part, out, CHUNK_SIZE)
+
+    if tmp.stat().st_size != size:
+        tmp.unlink(missing_ok=True)
+        raise RuntimeError("downloaded size does not match Content-Length")
+
+    os.replace(tmp, destination)
+
+    for path in part_paths:
+        path.unlink(missing_ok=True)
+    info_path.unlink(missing_ok=True)
+
+
+def verify_archive(path, sha256=None):
+    """
+    Checks the archive against sha256 when one is known,
+    and always runs the CRC check of every zip member.
+    Returns the archive's SHA-256.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+    actual = digest.hexdigest().lower()
+    if sha256 and actual != sha256.lower():
+        raise RuntimeError("checksum mismatch")
+
+    with zipfile.ZipFile(path, "r") as zip_ref:
+        bad = zip_ref.testzip()
+        if bad:
+            raise RuntimeError(f"corrupt member {bad}")
+
+    return actual
+
+
+def _expected_model_sha256():
+    if MODEL_SHA256:
+        return MODEL_SHA256
     try:
-        download_with_progress(MODEL_URL, zip_path)
-    except Exception as e:
-        print("\nDownload failed:", e)
-        sys.exit(1)
+        return MODEL_PIN_PATH.read_text(encoding="utf-8").strip() or None
+    except OSError:
+        return None
 
-    print("\nExtracting model...")
+
+def _pin_model_sha256(sha256):
+    if MODEL_SHA256 or MODEL_PIN_PATH.exists():
+        return
+    MODEL_PIN_PATH.parent.mkdir(parents=True, exist_ok=True)
+    MODEL_PIN_PATH.write_text(sha256 + "\n", encoding="utf-8")
+
+
+def extract_model(zip_path, target=MODEL_PATH):
+    """
+    Streams the archive into a temporary folder next to target,
+    then moves it into place with a single rename.
+    """
+    target = Path(target)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=".extract-", dir=target.parent))
+    tmp_root = tmp_dir.resolve()
 
     try:
         with zipfile.ZipFile(zip_path, "r") as zip_ref:
-            members = zip_ref.namelist()
+            members = zip_ref.infolist()
             total = len(members)
 
             for i, member in enumerate(members, start=1):
-                zip_ref.extract(member, BASE_DIR)
+                dest = (tmp_dir / member.filename).resolve()
+                if dest != tmp_root and tmp_root not in dest.parents:
+                    raise RuntimeError(f"unsafe path in archive: {member.filename}")
+
+                if member.is_dir():
+                    dest.mkdir(parents=True, exist_ok=True)
+                else:
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    with zip_ref.open(member) as src, open(dest, "wb") as dst:
+                        shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
                 progress_bar(i, total, prefix="Extracting")
+
+        entries = list(tmp_dir.iterdir())
+        root = entries[0] if len(entries) == 1 and entries[0].is_dir() else tmp_dir
+
+        os.replace(root, target)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+
+def download_model(url=MODEL_URL, target=MODEL_PATH):
+    target = Path(target)
+    zip_path = target.parent / f"{target.name}.zip"
+
+    print("Vosk model not found.\n")
+
+    try:
+        if not zip_path.exists():
+            download_with_progress(url, zip_path)
+        sha256 = verify_archive(zip_path, _expected_model_sha256())
+    except Exception as e:
+        print("\nDownload failed:", e)
+        zip_path.unlink(missing_ok=True)
+        sys.exit(1)
+
+    print("\nExtracting model...")
+
+    try:
+        extract_model(zip_path, target)
     except Exception as e:
         print("\nExtraction failed:", e)
         sys.exit(1)
-    finally:
-        zip_path.unlink(missing_ok=True)
 
-    if not MODEL_PATH.exists():
-        for folder in BASE_DIR.iterdir():
-            if folder.is_dir() and MODEL_NAME in folder.name:
-                shutil.move(str(folder), str(MODEL_PATH))
-                break
+    zip_path.unlink(missing_ok=True)
+    _pin_model_sha256(sha256)
 
-    if not MODEL_PATH.exists():
+    if not target.exists():
         print("\nModel extraction failed.")
         sys.exit(1)
 
@@ -1,49 +1,16 @@
-import os
 import json
 import requests
-import sys
-from pathlib import Path
+import time
+
+from http_client import get_session
+from prompt_builder import build_prompt
+from tracing import span, record
+from memory.config_manager import get_openrouter_key, get_system_prompt
+from memory.response_cache import response_cache, normalize_query, is_cacheable
 
 OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
 MODEL = "arcee-ai/trinity-large-preview:free"
 
-def get_base_dir():
-    if getattr(sys, "frozen", False):
-        return Path(sys.executable).parent
-    return Path(__file__).resolve().parent
-
-BASE_DIR = get_base_dir()
-
-PROMPT_PATH = BASE_DIR / "engine" / "instructions.txt"
-API_CONFIG_PATH = BASE_DIR / "settings" / "keys.json"
-
-def load_api_keys() -> dict:
-    if not os.path.exists(API_CONFIG_PATH):
-        return {}
-
-    try:
-        with open(API_CONFIG_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        print(f" Failed to read api_keys.json: {e}")
-        return {}
-
-
-def get_openrouter_key() -> str | None:
-    keys = load_api_keys()
-    return keys.get("openrouter_api_key")
-
-def load_system_prompt() -> str:
-    try:
-        with open(PROMPT_PATH, "r", encoding="utf-8") as f:
-            return f.read()
-    except Exception as e:
-        print(f" prompt.txt couldn't be loaded: {e}")
-        return "You are Aeris, a helpful AI assistant."
-
-
-SYSTEM_PROMPT = load_system_prompt()
-
 def safe_json_parse(text: str) -> dict | None:
     if not text:
         return None
@@ -75,45 +42,246 @@ def safe_json_parse(text: str) -> dict | None:
         print(f" Raw text preview: {text[:200]}")
         return None
 
-def get_llm_output(user_text: str, memory_block: dict | None = None) -> dict:
+class StreamingEnvelopeParser:
+    """
+    Incremental scanner for the JSON envelope the model streams back.
+
+    Top-level fields are reported as soon as their value closes,
+    the "text" field is reported piece by piece while it arrives.
+    Anything before the first "{" (```json fences, prose) is ignored.
+    """
+
+    def __init__(self):
+        self.raw = ""
+        self.fields: dict = {}
+
+        self._pos = 0
+        self._started = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+        self._expect = "key"
+        self._key_start = None
+        self._key = None
+        self._value_start = None
+        self._value_kind = None
+
+        self._text_start = None
+        self._text_emitted = ""
+
+    def feed(self, chunk: str) -> list[tuple]:
+        events = []
+        if not chunk or self._done:
+            return events
+
+        self.raw += chunk
+
+        while self._pos < len(self.raw) and not self._done:
+            self._step(self._pos, self.raw[self._pos], events)
+            self._pos += 1
+
+        if self._text_start is not None:
+            self._emit_text(self._pos, events)
+
+        return events
+
+    def _step(self, i: int, ch: str, events: list):
+        if not self._started:
+            if ch == "{":
+                self._started = True
+                self._depth = 1
+            return
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                if self._depth == 1 and self._expect == "key_string":
+                    self._key = json.loads(self.raw[self._key_start:i + 1])
+                    self._expect = "colon"
+                elif self._depth == 1 and self._value_kind == "string":
+                    if self._text_start is not None:
+                        self._emit_text(i, events)
+                        self._text_start = None
+                    self._finish_field(self.raw[self._value_start:i + 1], events)
+                    self._expect = "after_value"
+            return
+
+        if ch.isspace():
+            return
+
+        if ch == '"':
+            self._in_string = True
+            if self._depth == 1 and self._expect == "key":
+                self._key_start = i
+                self._expect = "key_string"
+            elif self._depth == 1 and self._expect == "value":
+                self._value_start = i
+                self._value_kind = "string"
+                self._expect = "in_value"
+                if self._key == "text":
+                    self._text_start = i + 1
+                    self._text_emitted = ""
+            return
+
+        if ch == ":" and self._depth == 1 and self._expect == "colon":
+            self._expect = "value"
+            return
+
+        if ch in "{[":
+            if self._depth == 1 and self._expect == "value":
+                self._value_start = i
+                self._value_kind = "container"
+                self._expect = "in_value"
+            self._depth += 1
+            return
+
+        if ch in "}]":
+            self._depth -= 1
+            if self._depth == 1 and self._value_kind == "container" and self._expect == "in_value":
+                self._finish_field(self.raw[self._value_start:i + 1], events)
+                self._expect = "after_value"
+            elif self._depth == 0:
+                if self._value_kind == "literal" and self._expect == "in_value":
+                    self._finish_field(self.raw[self._value_start:i], events)
+                self._done = True
+            return
+
+        if ch == "," and self._depth == 1:
+            if self._value_kind == "literal" and self._expect == "in_value":
+                self._finish_field(self.raw[self._value_start:i], events)
+            self._expect = "key"
+            return
+
+        if self._depth == 1 and self._expect == "value":
+            self._value_start = i
+            self._value_kind = "literal"
+            self._expect = "in_value"
+
+    def _finish_field(self, value_raw: str, events: list):
+        try:
+            value = json.loads(value_raw.strip())
+        except Exception:
+            value = None
+
+        self.fields[self._key] = value
+        events.append(("field", self._key, value))
+
+        self._value_start = None
+        self._value_kind = None
+
+    def _emit_text(self, end: int, events: list):
+        body = self.raw[self._text_start:end]
+
+        # An escape sequence may be cut in half by the chunk boundary,
+        # hold back the unfinished tail until the next chunk completes it.
+        for trim in range(min(len(body), 6) + 1):
+            try:
+                decoded = json.loads(f'"{body[:len(body) - trim]}"', strict=False)
+                break
+            except ValueError:
+                continue
+        else:
+            return
+
+        if decoded and "\ud800" <= decoded[-1] <= "\udbff":
+            decoded = decoded[:-1]
+
+        if len(decoded) > len(self._text_emitted):
+            events.append(("text", decoded[len(self._text_emitted):]))
+            self._text_emitted = decoded
+
+
+def _chat_result(text: str) -> dict:
+    return {
+        "intent": "chat",
+        "parameters": {},
+        "needs_clarification": False,
+        "text": text,
+        "memory_update": None
+    }
+
+
+def _envelope_result(parsed: dict) -> dict:
+    return {
+        "intent": parsed.get("intent", "chat"),
+        "parameters": parsed.get("parameters", {}),
+        "needs_clarification": parsed.get("needs_clarification", False),
+        "text": parsed.get("text"),
+        "memory_update": parsed.get("memory_update")
+    }
+
+
+def _iter_sse_content(response):
+    """
+    Yields content deltas from an OpenRouter SSE stream.
+    """
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or line.startswith(":"):
+            continue
+
+        if not line.startswith("data:"):
+            continue
+
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+
+        try:
+            chunk = json.loads(data)
+        except Exception:
+            continue
+
+        if chunk.get("error"):
+            raise RuntimeError(chunk["error"].get("message", "stream error"))
+
+        choices = chunk.get("choices") or []
+        if not choices:
+            continue
+
+        delta = choices[0].get("delta") or {}
+        content = delta.get("content")
+        if content:
+            yield content
+
+
+def stream_llm_output(user_text: str, memory_block: dict | None = None, cancel_event=None):
+    """
+    Streaming variant of get_llm_output.
+
+    Yields:
+        - ("field", name, value) as soon as a top-level envelope field closes
+        - ("text", delta) while the "text" field is being generated
+        - ("result", dict) once, at the end, shaped like get_llm_output()
+
+    Setting cancel_event (a threading.Event) aborts the request and ends
+    the stream without a result.
+    """
 
     if not user_text or not user_text.strip():
-        return {
-            "intent": "chat",
-            "parameters": {},
-            "needs_clarification": False,
-            "text": "Sir, I didn't catch that.",
-            "memory_update": None
-        }
+        yield ("result", _chat_result("Sir, I didn't catch that."))
+        return
 
     api_key = get_openrouter_key()
     if not api_key:
         print(" OPENROUTER API KEY NOT FOUND")
-        return {
-            "intent": "chat",
-            "parameters": {},
-            "needs_clarification": False,
-            "text": "OpenRouter API key is missing, Sir.",
-            "memory_update": None
-        }
-
-    memory_str = ""
-    if memory_block:
-        memory_str = "\n".join(f"{k}: {v}" for k, v in memory_block.items())
+        yield ("result", _chat_result("OpenRouter API key is missing, Sir."))
+        return
 
-    user_prompt = f"""User message: "{user_text}"
-
-Known user memory:
-{memory_str if memory_str else "No memory available"}"""
+    prompt = build_prompt(user_text, get_system_prompt(), memory_block)
+    print(f" Prompt tokens: {prompt['prompt_tokens']} (max_tokens {prompt['max_tokens']})")
 
     payload = {
         "model": MODEL,
-        "messages": [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": user_prompt}
-        ],
+        "messages": prompt["messages"],
         "temperature": 0.2,
-        "max_tokens": 500
+        "max_tokens": prompt["max_tokens"],
+        "stream": True
     }
 
     headers = {
@@ -123,62 +291,119 @@ Known user memory:
         "X-Title": "Aeris-Assistant"
     }
 
+    if cancel_event is not None and cancel_event.is_set():
+        return
+
     try:
-        response = requests.post(
-            OPENROUTER_URL,
-            headers=headers,
-            json=payload,
-            timeout=30
-        )
-
-        if response.status_code != 200:
-            print(f" OpenRouter API Error: {response.text}")
-            return {
-                "intent": "chat",
-                "parameters": {},
-                "needs_clarification": False,
-                "text": f"Sir, API error ({response.status_code}).",
-                "memory_update": None
-            }
-
-        data = response.json()
-        content = data["choices"][0]["message"]["content"]
+        requested_at = time.perf_counter()
+
+        with span("llm.headers", prompt_tokens=prompt["prompt_tokens"]):
+            response = get_session().post(
+                OPENROUTER_URL,
+                headers=headers,
+                json=payload,
+                timeout=30,
+                stream=True
+            )
+
+        with response:
+            if response.status_code != 200:
+                print(f" OpenRouter API Error: {response.text}")
+                yield ("result", _chat_result(f"Sir, API error ({response.status_code})."))
+                return
+
+            parser = StreamingEnvelopeParser()
+
+            if "text/event-stream" in response.headers.get("Content-Type", ""):
+                first = True
+                for delta in _iter_sse_content(response):
+                    if cancel_event is not None and cancel_event.is_set():
+                        return
+                    if first:
+                        first = False
+                        record("llm.first_token", (time.perf_counter() - requested_at) * 1000)
+                    yield from parser.feed(delta)
+                content = parser.raw
+            else:
+                data = response.json()
+                content = data["choices"][0]["message"]["content"] or ""
+                yield from parser.feed(content)
 
         parsed = safe_json_parse(content)
 
         if parsed:
-            return {
-                "intent": parsed.get("intent", "chat"),
-                "parameters": parsed.get("parameters", {}),
-                "needs_clarification": parsed.get("needs_clarification", False),
-                "text": parsed.get("text"),
-                "memory_update": parsed.get("memory_update")
-            }
-
-        return {
-            "intent": "chat",
-            "parameters": {},
-            "needs_clarification": False,
-            "text": content,
-            "memory_update": None
-        }
+            yield ("result", _envelope_result(parsed))
+            return
+
+        yield ("result", _chat_result(content))
 
     except requests.exceptions.Timeout:
         print(" OpenRouter timeout")
-        return {
-            "intent": "chat",
-            "parameters": {},
-            "needs_clarification": False,
-            "text": "Sir, the request timed out.",
-            "memory_update": None
-        }
+        yield ("result", _chat_result("Sir, the request timed out."))
 
     except Exception as e:
         print(f" LLM ERROR: {e}")
-        return {
-            "intent": "chat",
-            "parameters": {},
-            "needs_clarification": False,
-            "text": "Sir, a system error occurred.",
-            "memory_update": None
-        }
\ No newline at end of file
+        yield ("result", _chat_result("Sir, a system error occurred."))
+
+
+def get_llm_output(
+    user_text: str,
+    memory_block: dict | None = None,
+    on_text=None,
+    on_field=None,
+    memory_paths: list[str] | None = None,
+    cancel_event=None
+) -> dict | None:
+    """
+    Runs one LLM turn and returns the parsed envelope.
+
+    on_text(delta) receives the "text" field while it streams,
+    on_field(name, value) receives each envelope field as soon as it closes.
+    memory_paths lists the long-term memory facts memory_block was built
+    from, cached answers are dropped when one of them changes.
+    Returns None if cancel_event was set before the answer completed.
+    """
+
+    query = normalize_query(user_text)
+    cache_key = None
+
+    if query:
+        memory_block = memory_block or {}
+        memory_slice = {
+            k: v for k, v in memory_block.items()
+            if k not in ("recent_conversation", "conversation_summary")
+        }
+
+        cache_key = response_cache.make_key(query, get_system_prompt(), memory_slice)
+        cached = response_cache.get(cache_key)
+
+        if cached:
+            for name, value in cached.items():
+                if on_field:
+                    on_field(name, value)
+            if on_text and cached.get("text"):
+                on_text(cached["text"])
+            return cached
+
+    result = None
+    parsed = False
+
+    for event in stream_llm_output(user_text, memory_block, cancel_event):
+        kind = event[0]
+
+        if kind == "text" and on_text:
+            on_text(event[1])
+        elif kind == "field":
+            parsed = True
+            if on_field:
+                on_field(event[1], event[2])
+        elif kind == "result":
+            result = event[1]
+
+    if result is None:
+        return None
+
+    if cache_key and parsed and is_cacheable(result, user_text):
+        response_cache.put(cache_key, query, result, memory_paths)
+
+    return result
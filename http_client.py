@@ -0,0 +1,96 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# One pool per host, kept alive between turns so only the first request
+# to OpenRouter / SerpAPI / OpenSky pays for the TCP + TLS handshake.
+POOL_CONNECTIONS = int(os.getenv("AERIS_HTTP_POOLS", 8))
+POOL_MAXSIZE = int(os.getenv("AERIS_HTTP_POOL_SIZE", 4))
+
+# Retry policy. POST is never retried once the request has been sent,
+# only connection failures are (nothing reached the server yet).
+RETRY_TOTAL = int(os.getenv("AERIS_HTTP_RETRIES", 2))
+RETRY_BACKOFF = float(os.getenv("AERIS_HTTP_BACKOFF", 0.3))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+WARMUP_URLS = [
+    "https://openrouter.ai/",
+    "https://serpapi.com/",
+    "https://opensky-network.org/",
+]
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def _build_retry() -> Retry:
+    return Retry(
+        total=RETRY_TOTAL,
+        connect=RETRY_TOTAL,
+        read=0,
+        status=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def create_session() -> requests.Session:
+    session = requests.Session()
+
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=_build_retry(),
+    )
+
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Shared keep-alive session used by every outgoing HTTP call.
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+
+    return _session
+
+
+def warm_up(urls: list[str] | None = None, timeout: float = 5) -> None:
+    """
+    Opens a pooled connection to each host in the background,
+    so the first real turn doesn't pay for the handshake.
+    """
+
+    def runner():
+        session = get_session()
+        for url in urls or WARMUP_URLS:
+            try:
+                session.head(url, timeout=timeout, allow_redirects=False)
+            except Exception as e:
+                print(f" HTTP warm-up failed for {url}: {e}")
+
+    threading.Thread(target=runner, daemon=True).start()
+
+
+def close_session() -> None:
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
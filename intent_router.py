@@ -0,0 +1,520 @@
+import re
+import math
+from collections import Counter
+
+
+# Turns routed locally must score at least this, everything else goes to the LLM.
+ROUTER_MIN_CONFIDENCE = 0.75
+
+# Confidence kept when the n-gram model disagrees with the grammar.
+DISAGREEMENT_PENALTY = 0.6
+
+NGRAM_SIZE = 3
+
+# open_app only routes locally for these (spoken name -> name typed into
+# Windows search); "open the door" or "start the car" go to the LLM.
+KNOWN_APPS = {
+    "spotify": "Spotify",
+    "chrome": "Chrome",
+    "google chrome": "Chrome",
+    "firefox": "Firefox",
+    "edge": "Microsoft Edge",
+    "microsoft edge": "Microsoft Edge",
+    "brave": "Brave",
+    "opera": "Opera",
+    "notepad": "Notepad",
+    "calculator": "Calculator",
+    "calendar": "Calendar",
+    "camera": "Camera",
+    "clock": "Clock",
+    "photos": "Photos",
+    "paint": "Paint",
+    "mail": "Mail",
+    "settings": "Settings",
+    "file explorer": "File Explorer",
+    "explorer": "File Explorer",
+    "task manager": "Task Manager",
+    "control panel": "Control Panel",
+    "snipping tool": "Snipping Tool",
+    "terminal": "Terminal",
+    "command prompt": "Command Prompt",
+    "cmd": "Command Prompt",
+    "powershell": "PowerShell",
+    "microsoft store": "Microsoft Store",
+    "visual studio code": "Visual Studio Code",
+    "vs code": "Visual Studio Code",
+    "vscode": "Visual Studio Code",
+    "visual studio": "Visual Studio",
+    "word": "Word",
+    "excel": "Excel",
+    "powerpoint": "PowerPoint",
+    "outlook": "Outlook",
+    "onenote": "OneNote",
+    "teams": "Teams",
+    "zoom": "Zoom",
+    "skype": "Skype",
+    "steam": "Steam",
+    "epic games": "Epic Games Launcher",
+    "obs": "OBS Studio",
+    "vlc": "VLC",
+    "whatsapp": "WhatsApp",
+    "telegram": "Telegram",
+    "discord": "Discord",
+    "slack": "Slack",
+    "signal": "Signal",
+    "messenger": "Messenger",
+}
+
+# A slot made only of these refers back to the conversation ("search for
+# it", "google that one"), which only the LLM can resolve.
+VAGUE_WORDS = {
+    "it", "that", "this", "them", "those", "these", "him", "her", "me", "us",
+    "one", "same", "the", "up", "again", "there",
+}
+
+# Words that never appear in a city name in front of "weather".
+NOT_CITY_WORDS = {
+    "the", "a", "an", "my", "your", "what", "what's", "how", "how's", "current", "today's",
+    "turn", "switch", "off", "on", "set", "open", "play", "stop", "lights", "light", "and", "or",
+    "is", "it", "i", "me", "you", "good", "bad", "nice", "cold", "hot",
+}
+CITY_MAX_WORDS = 3
+
+# "<city> weather" without "in"/"for" only routes for these; "lovely
+# weather" or "great weather today" is small talk, not a lookup.
+KNOWN_CITIES = {
+    "london", "paris", "berlin", "madrid", "rome", "milan", "lisbon", "dublin", "amsterdam",
+    "brussels", "vienna", "prague", "warsaw", "budapest", "zurich", "geneva", "munich",
+    "hamburg", "barcelona", "athens", "istanbul", "moscow", "stockholm", "oslo", "copenhagen",
+    "helsinki", "edinburgh", "manchester", "new york", "los angeles", "chicago", "houston",
+    "phoenix", "san francisco", "seattle", "boston", "miami", "atlanta", "dallas", "denver",
+    "washington", "las vegas", "toronto", "vancouver", "montreal", "mexico city",
+    "sao paulo", "rio de janeiro", "buenos aires", "lima", "bogota", "santiago", "tokyo",
+    "osaka", "seoul", "beijing", "shanghai", "hong kong", "singapore", "bangkok", "manila",
+    "jakarta", "kuala lumpur", "delhi", "new delhi", "mumbai", "bangalore", "kolkata",
+    "chennai", "hyderabad", "karachi", "lahore", "dubai", "abu dhabi", "riyadh", "doha",
+    "tel aviv", "cairo", "lagos", "nairobi", "johannesburg", "cape town", "sydney",
+    "melbourne", "brisbane", "perth", "auckland",
+}
+
+WEATHER_TIMES = (
+    r"today|tonight|tomorrow|this (?:morning|afternoon|evening|weekend)|next week"
+    r"|(?:on |this |next )?(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)"
+)
+
+_FILLER = re.compile(
+    r"^(?:(?:hey|hi|ok|okay)\s+)?(?:aeris\s*,?\s*)?"
+    r"(?:(?:can|could|would|will) you\s+)?(?:please\s+)?"
+)
+_TRAILING = re.compile(r"\s*(?:,?\s*(?:please|for me|now|thanks|thank you))+$")
+_PUNCTUATION = re.compile(r"[^\w\s'.+-]")
+
+# Slots passed on as the user wrote them ("C# tutorials", not "c tutorials").
+VERBATIM_SLOTS = ("query",)
+
+
+def _normalize_spans(text: str) -> tuple[str, list[int]]:
+    """
+    Lowercases text, blanks out punctuation, collapses whitespace and drops
+    filler like "hey aeris, could you" or a trailing "please". Also returns
+    the index in text of every character kept, so slots matched on the
+    normalized text can be cut from the original.
+    """
+    chars, origin = [], []
+    for i, ch in enumerate(text or ""):
+        for c in ch.lower():
+            if c.isspace() or _PUNCTUATION.match(c):
+                if not chars or chars[-1] == " ":
+                    continue
+                c = " "
+            chars.append(c)
+            origin.append(i)
+
+    def cut(start, end):
+        return normalized[start:end], origin[start:end]
+
+    normalized = "".join(chars)
+    normalized, origin = cut(len(normalized) - len(normalized.lstrip(" .")), len(normalized.rstrip(" .")))
+    normalized, origin = cut(_FILLER.match(normalized).end(), len(normalized))
+
+    trailing = _TRAILING.search(normalized)
+    if trailing:
+        normalized, origin = cut(0, trailing.start())
+
+    return normalized.rstrip(), origin[:len(normalized.rstrip())]
+
+
+def _normalize(text: str) -> str:
+    return _normalize_spans(text)[0]
+
+
+GRAMMAR = [
+    (
+        "open_app",
+        0.9,
+        re.compile(
+            r"^(?:open|launch|start|run|fire up)\s+(?:up\s+)?(?:the\s+|my\s+)?"
+            r"(?P<app_name>[\w.+-]+(?:\s[\w.+-]+){0,3}?)"
+            r"(?:\s+(?:app|application|program))?$"
+        ),
+    ),
+    (
+        "weather_report",
+        0.95,
+        re.compile(
+            r"^(?:what(?:'s| is) |how(?:'s| is) |show me |check |get )?(?:the )?"
+            r"(?:weather|forecast|weather forecast)(?: like)?\s+(?:in|for|at)\s+"
+            rf"(?P<city>[a-z][a-z .'-]*?)(?:\s+(?P<time>{WEATHER_TIMES}))?$"
+        ),
+    ),
+    (
+        "weather_report",
+        0.9,
+        re.compile(
+            r"^(?:the )?(?P<known_city>[a-z][a-z .'-]*?)\s+"
+            rf"(?:weather|forecast)(?:\s+(?P<time>{WEATHER_TIMES}))?$"
+        ),
+    ),
+    (
+        "search",
+        0.9,
+        re.compile(
+            r"^(?:search(?: the web| google| online| the internet)?(?: for)?|google|look up"
+            r"|find (?:information|info|news) (?:on|about))\s+(?P<query>.+)$"
+        ),
+    ),
+]
+
+
+# Exemplars for the char n-gram model. It only confirms or vetoes a grammar
+# match, so "chat" lines are the near misses the grammar would take.
+# send_message has no grammar on purpose: a message types into a real chat,
+# so it goes to the LLM, which keeps the wording and fixes the point of view
+# ("tell mom I love her" -> "I love you"). Its exemplars still pull those
+# utterances away from the other intents.
+EXEMPLARS = {
+    "open_app": [
+        "open spotify", "launch chrome", "start notepad", "open the calculator app",
+        "open visual studio code", "run steam", "open whatsapp", "launch discord",
+        "open file explorer", "start the camera app", "fire up word",
+    ],
+    "weather_report": [
+        "weather in paris tomorrow", "what's the weather in london", "forecast for tokyo",
+        "new york weather today", "how is the weather in berlin tonight",
+        "what is the weather like in madrid this weekend", "weather for chicago on friday",
+    ],
+    "search": [
+        "search for the latest iphone", "google how tall is the eiffel tower",
+        "look up python tutorials", "search the web for cheap flights",
+        "find news about the election", "search for what happened in ukraine today",
+    ],
+    "send_message": [
+        "send a message to dad saying hi", "text mom on whatsapp that i'm late",
+        "send a text to john on telegram saying see you soon", "message sarah say good morning",
+        "tell alex on whatsapp that dinner is ready",
+    ],
+    "chat": [
+        "open your heart to me", "start a conversation", "open up about yourself",
+        "start over", "run a diagnostic on yourself", "tell me a joke",
+        "tell me about yourself", "what's the weather usually like on mars",
+        "i feel like the weather is nice", "search your feelings", "look up at the sky",
+        "how are you today", "what is your name", "start thinking about it",
+    ],
+}
+
+
+def _ngrams(text: str) -> Counter:
+    padded = f" {text} "
+    return Counter(padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1))
+
+
+class NgramIntentModel:
+    """
+    Tiny TF-IDF model over character trigrams.
+    Each intent is the normalized centroid of its exemplars,
+    an utterance is scored by cosine similarity against them.
+    """
+
+    def __init__(self, exemplars: dict[str, list[str]]):
+        docs = [(intent, _ngrams(_normalize(t))) for intent, texts in exemplars.items() for t in texts]
+
+        df = Counter()
+        for _, grams in docs:
+            df.update(grams.keys())
+
+        total = len(docs)
+        self.idf = {g: math.log((1 + total) / (1 + n)) + 1 for g, n in df.items()}
+
+        centroids: dict[str, Counter] = {}
+        for intent, grams in docs:
+            vec = self._vector(grams)
+            centroid = centroids.setdefault(intent, Counter())
+            for g, w in vec.items():
+                centroid[g] += w
+
+        self.centroids = {intent: self._unit(vec) for intent, vec in centroids.items()}
+
+    @staticmethod
+    def _unit(vec: dict) -> dict:
+        norm = math.sqrt(sum(w * w for w in vec.values())) or 1.0
+        return {g: w / norm for g, w in vec.items()}
+
+    def _vector(self, grams: Counter) -> dict:
+        return self._unit({
+            g: (1 + math.log(n)) * self.idf[g]
+            for g, n in grams.items()
+            if g in self.idf
+        })
+
+    def scores(self, text: str) -> dict[str, float]:
+        vec = self._vector(_ngrams(text))
+        return {
+            intent: sum(w * centroid.get(g, 0.0) for g, w in vec.items())
+            for intent, centroid in self.centroids.items()
+        }
+
+    def classify(self, text: str) -> tuple[str, float]:
+        scores = self.scores(text)
+        intent = max(scores, key=scores.get)
+        return intent, scores[intent]
+
+
+_model: NgramIntentModel | None = None
+
+
+def get_model() -> NgramIntentModel:
+    global _model
+    if _model is None:
+        _model = NgramIntentModel(EXEMPLARS)
+    return _model
+
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+# Tokens shorter than this must match exactly, longer ones may differ by one edit.
+FUZZY_MIN_LENGTH = 5
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall((text or "").lower())
+
+
+def _deletions(token: str) -> set[str]:
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """
+    True when a and b differ by at most one insertion, deletion,
+    substitution or swap of adjacent letters.
+    """
+    if a == b:
+        return True
+
+    if abs(len(a) - len(b)) > 1:
+        return False
+
+    if len(a) == len(b):
+        diff = [i for i in range(len(a)) if a[i] != b[i]]
+        if len(diff) == 1:
+            return True
+        return (
+            len(diff) == 2
+            and diff[1] == diff[0] + 1
+            and a[diff[0]] == b[diff[1]]
+            and a[diff[1]] == b[diff[0]]
+        )
+
+    if len(a) > len(b):
+        a, b = b, a
+
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+
+    return a[i:] == b[i + 1:]
+
+
+class CommandMatcher:
+    """
+    Precompiled matcher for short command phrases.
+
+    Phrases are normalized and tokenized once. An inverted index of
+    their tokens (plus one-deletion variants for fuzzy tokens) narrows an
+    utterance down to a few candidates, which must then contain every
+    phrase token in order, each equal or within one edit, with at most
+    max_gap unrelated tokens between them.
+    """
+
+    def __init__(
+        self,
+        phrases: list[str],
+        fuzzy: bool = True,
+        max_gap: int = 1,
+        max_extra_tokens: int | None = None
+    ):
+        self.phrases = [p for p in phrases if tokenize(p)]
+        self.fuzzy = fuzzy
+        self.max_gap = max_gap
+        self.max_extra_tokens = max_extra_tokens
+
+        self._tokens = [tuple(tokenize(p)) for p in self.phrases]
+        self._index: dict[str, set[int]] = {}
+
+        for idx, tokens in enumerate(self._tokens):
+            for token in tokens:
+                for key in self._keys(token):
+                    self._index.setdefault(key, set()).add(idx)
+
+    def _keys(self, token: str) -> set[str]:
+        if self.fuzzy and len(token) >= FUZZY_MIN_LENGTH - 1:
+            return {token} | _deletions(token)
+        return {token}
+
+    def _same(self, a: str, b: str) -> bool:
+        if a == b:
+            return True
+        if not self.fuzzy or max(len(a), len(b)) < FUZZY_MIN_LENGTH:
+            return False
+        return _within_one_edit(a, b)
+
+    def _contains(self, words: list[str], phrase: tuple[str, ...]) -> bool:
+        for start, word in enumerate(words):
+            if not self._same(word, phrase[0]):
+                continue
+
+            pos = start
+            for token in phrase[1:]:
+                window = words[pos + 1:pos + 2 + self.max_gap]
+                step = next((k for k, w in enumerate(window) if self._same(w, token)), None)
+                if step is None:
+                    break
+                pos += step + 1
+            else:
+                return True
+
+        return False
+
+    def match(self, text) -> str | None:
+        """
+        Returns the first phrase found in text (a string or token list), or None.
+        """
+        words = tokenize(text) if isinstance(text, str) else text
+        if not words:
+            return None
+
+        candidates = set()
+        for word in words:
+            for key in self._keys(word):
+                hit = self._index.get(key)
+                if hit:
+                    candidates |= hit
+
+        for idx in sorted(candidates):
+            phrase = self._tokens[idx]
+            if self.max_extra_tokens is not None and len(words) - len(phrase) > self.max_extra_tokens:
+                continue
+            if self._contains(words, phrase):
+                return self.phrases[idx]
+
+        return None
+
+    def __call__(self, text) -> bool:
+        return self.match(text) is not None
+
+
+def _is_vague(value: str) -> bool:
+    return all(word in VAGUE_WORDS for word in tokenize(value))
+
+
+def _clean_parameters(intent: str, params: dict) -> dict | None:
+    params = {k: v.strip(" ,.'") for k, v in params.items() if v}
+
+    if intent == "open_app":
+        app = KNOWN_APPS.get(params.get("app_name", ""))
+        return {"app_name": app} if app else None
+
+    if intent == "weather_report":
+        if "known_city" in params:
+            if params["known_city"] not in KNOWN_CITIES:
+                return None
+            params["city"] = params.pop("known_city")
+
+        words = params.get("city", "").split()
+        if not words or len(words) > CITY_MAX_WORDS or any(w in NOT_CITY_WORDS for w in words):
+            return None
+        return {
+            "city": params["city"].title(),
+            "time": params.get("time") or "today",
+        }
+
+    if intent == "search":
+        query = params.get("query", "").rstrip("?!")
+        if not query or _is_vague(query):
+            return None
+        return {"query": query}
+
+    return None
+
+
+def classify(user_text: str) -> tuple[str | None, dict, float]:
+    """
+    Returns (intent, parameters, confidence) from the local grammar.
+    intent is None when no rule produced a complete set of slots.
+    """
+    text, origin = _normalize_spans(user_text)
+    if not text:
+        return None, {}, 0.0
+
+    for intent, confidence, pattern in GRAMMAR:
+        match = pattern.match(text)
+        if not match:
+            continue
+
+        params = match.groupdict()
+        for name in VERBATIM_SLOTS:
+            start, end = match.span(name) if name in params else (-1, -1)
+            if end > start >= 0:
+                params[name] = user_text[origin[start]:origin[end - 1] + 1]
+
+        params = _clean_parameters(intent, params)
+        if params is None:
+            continue
+
+        predicted, _ = get_model().classify(text)
+        if predicted != intent:
+            confidence *= DISAGREEMENT_PENALTY
+
+        return intent, params, confidence
+
+    return None, {}, 0.0
+
+
+def route_intent(user_text: str, min_confidence: float = ROUTER_MIN_CONFIDENCE) -> dict | None:
+    """
+    Resolves deterministic commands without the LLM.
+
+    Returns a dict shaped like brain.get_llm_output() when the local
+    grammar is confident enough, otherwise None (ask the LLM).
+    """
+    intent, params, confidence = classify(user_text)
+
+    if intent is None or confidence < min_confidence:
+        return None
+
+    return {
+        "intent": intent,
+        "parameters": params,
+        "needs_clarification": False,
+        "text": None,
+        "memory_update": None
+    }
+
+
+INTERRUPT_COMMANDS = ["mute", "quit", "exit", "stop"]
+ALARM_KEYWORDS = ["set alarm", "wake me up", "alarm at", "alarm in"]
+
+# "stop" must be (nearly) the whole utterance, not part of
+# "where is the nearest bus stop from the station".
+INTERRUPT_MATCHER = CommandMatcher(INTERRUPT_COMMANDS, fuzzy=False, max_extra_tokens=3)
+ALARM_MATCHER = CommandMatcher(ALARM_KEYWORDS)
@@ -2,12 +2,15 @@ import flet as ft
 import asyncio
 import math
 import time
-import os
-import json
+import re
 import threading
+from collections.abc import Iterator
 from pathlib import Path
 import sys
 
+from memory.config_manager import save_api_keys
+from memory.chat_transcript import chat_transcript
+
 
 def get_base_dir():
     if getattr(sys, "frozen", False):
@@ -19,6 +22,48 @@ BASE_DIR = get_base_dir()
 CONFIG_DIR = BASE_DIR / "settings"
 API_FILE = CONFIG_DIR / "keys.json"
 
+# The orb is redrawn per frame only while it follows the audio level.
+# Otherwise one implicit scale animation is sent per half breath and
+# Flet tweens it client-side; in chat mode or minimized nothing is sent.
+ACTIVE_FPS = 30
+ACTIVE_STATES = ("listening", "speaking")
+BREATHE_SECONDS = math.pi / 1.8
+BREATHE_AMPLITUDE = 0.03
+MIN_SCALE_STEP = 0.002
+
+# Chat replies are revealed a few words per frame, in at most
+# TYPING_MAX_UPDATES updates once the full text is known.
+TYPING_FPS = 30
+TYPING_MAX_UPDATES = 40
+
+_WORD_END = re.compile(r"\s")
+
+# Live chat bubbles are capped at CHAT_WINDOW; older and newer messages
+# are paged in from the transcript CHAT_PAGE at a time on scroll.
+CHAT_WINDOW = 60
+CHAT_PAGE = 20
+CHAT_SCROLL_EDGE = 80
+
+STATE_BOOST = {
+    "idle": 0.0,
+    "listening": 0.15,
+    "processing": 0.18,
+    "speaking": 0.35,
+}
+
+
+def _reveal_point(text, target, complete):
+    """Index to reveal up to: target rounded up to a word end, never mid-word while streaming."""
+    if target < len(text):
+        match = _WORD_END.search(text, target)
+        if match:
+            return match.start()
+    if complete:
+        return len(text)
+
+    last_space = max(text.rfind(" "), text.rfind("\n"))
+    return max(last_space, 0)
+
 
 class AerisUI:
     def __init__(self, size=(1000, 720)):
@@ -35,10 +80,18 @@ class AerisUI:
         self._orb_base = 170
 
         self._running = True
+        self._window_hidden = False
+        self._ui_loop = None
+        self._frame_event = None
+        self._orb_animation = None
 
         self.push_to_talk_event = threading.Event()
         self.backend_loop = None
+        self.on_window_ready = None
+        self.on_user_message = None  # async (ui, text, use_tts), set by aeris.main
         self._chat_loading_ref = None
+        self._chat_at_end = True
+        self._chat_has_older = True
 
 
     def set_backend_loop(self, loop):
@@ -64,6 +117,7 @@ class AerisUI:
         page.window_height = self.size[1]
         page.theme_mode = ft.ThemeMode.DARK
         page.bgcolor = "#0b0f19"
+        page.on_window_event = self._on_window_event
 
         if not API_FILE.exists():
             self._show_setup()
@@ -72,6 +126,9 @@ class AerisUI:
 
         page.update()
 
+        if self.on_window_ready:
+            self.on_window_ready()
+
 
     def _show_setup(self):
 
@@ -182,17 +239,10 @@ class AerisUI:
         if not openrouter_key:
             return
 
-        os.makedirs(CONFIG_DIR, exist_ok=True)
-
-        with open(API_FILE, "w", encoding="utf-8") as f:
-            json.dump(
-                {
-                    "openrouter_api_key": openrouter_key,
-                    "serpapi_api_key": serpapi_key,
-                },
-                f,
-                indent=4,
-            )
+        save_api_keys(
+            openrouter_api_key=openrouter_key,
+            serpapi_api_key=serpapi_key,
+        )
 
         asyncio.create_task(self._success_animation())
 
@@ -312,8 +362,10 @@ class AerisUI:
             expand=True,
             spacing=14,
             padding=25,
-            auto_scroll=True,
+            on_scroll=self._on_chat_scroll,
+            on_scroll_interval=100,
         )
+        self._chat_list.controls = [self._chat_row(*row) for row in chat_transcript.latest(CHAT_PAGE)]
 
         self._input = ft.TextField(
             hint_text="Message...",
@@ -366,45 +418,91 @@ class AerisUI:
         loading = self._bubble("Thinking...", user=False)
         self._chat_loading_ref = loading
         self._safe_ui(lambda: self._chat_list.controls.append(loading))
-        self._safe_ui(self._page.update)
+        self._safe_ui(self._show_chat_end)
 
 
     def remove_chat_loading(self):
-        if self._chat_loading_ref:
-            try:
-                self._safe_ui(lambda: self._chat_list.controls.remove(self._chat_loading_ref))
-            except:
-                pass
+        loading = self._chat_loading_ref
+        if loading:
             self._chat_loading_ref = None
-            self._safe_ui(self._page.update)
 
+            def remove():
+                if loading in self._chat_list.controls:
+                    self._chat_list.controls.remove(loading)
+                self._chat_list.update()
+
+            self._safe_ui(remove)
 
-    def append_ai_typing(self, full_text: str, speed: float = 0.02):
 
+    def append_ai_typing(self, text, speed: float = 0.02):
+        """
+        Types a reply into a new chat bubble. text is a string, or an
+        iterator of streamed chunks (see aeris.deliver_stream). speed is
+        seconds per character; the reveal is coalesced to TYPING_FPS.
+        """
         if self._mode != "chat":
             return
 
         async def typing_animation():
 
+            received = []
+            finished = asyncio.Event()
+            loop = asyncio.get_running_loop()
+
+            # Saved up front (or when the stream ends), not after the
+            # animation, so an interrupted reveal never leaves a blank row.
+            message_id = chat_transcript.append("ai", text if isinstance(text, str) else "")
+            bubble = self._chat_row(message_id, "ai", "")
+
+            if isinstance(text, str):
+                received.append(text)
+                finished.set()
+            else:
+                def drain():
+                    try:
+                        for chunk in text:
+                            received.append(chunk)
+                    finally:
+                        chat_transcript.update(message_id, "".join(received))
+                        loop.call_soon_threadsafe(finished.set)
+                threading.Thread(target=drain, daemon=True).start()
+
             self.remove_chat_loading()
 
-            bubble = self._bubble("", user=False)
+            def add_bubble():
+                self._show_message(bubble)
+                self._show_chat_end()
 
-            self._safe_ui(lambda: self._chat_list.controls.append(bubble))
-            self._safe_ui(self._page.update)
+            self._safe_ui(add_bubble)
 
             text_control = bubble.controls[0].content
-            current_text = ""
+            chars_per_frame = max(1, round(1 / (speed * TYPING_FPS)))
+            shown = 0
+
+            while True:
+                complete = finished.is_set()
+                available = "".join(received)
+
+                step = chars_per_frame
+                if complete:
+                    step = max(step, -(-len(available) // TYPING_MAX_UPDATES))
+
+                end = _reveal_point(available, shown + step, complete)
+
+                if end > shown:
+                    shown = end
+                    value = available[:shown]
 
-            for char in full_text:
-                current_text += char
+                    def update(value=value):
+                        text_control.value = value
+                        text_control.update()
 
-                def update():
-                    text_control.value = current_text
-                    self._page.update()
+                    self._safe_ui(update)
 
-                self._safe_ui(update)
-                await asyncio.sleep(speed)
+                if complete and shown >= len(available):
+                    break
+
+                await asyncio.sleep(1 / TYPING_FPS)
 
         if self.backend_loop:
             asyncio.run_coroutine_threadsafe(
@@ -419,23 +517,24 @@ class AerisUI:
         if not text:
             return
 
-        self._chat_list.controls.append(self._bubble(text, user=True))
+        self._show_message(self._new_message("user", text))
         self._input.value = ""
-        self._page.update()
+        self._input.update()
+        self._show_chat_end()
 
         self.show_chat_loading()
 
-        if self.backend_loop:
-            from aeris import process_user_input
+        if self.backend_loop and self.on_user_message:
             asyncio.run_coroutine_threadsafe(
-                process_user_input(self, text, use_tts=False),
+                self.on_user_message(self, text, use_tts=False),
                 self.backend_loop
             )
 
 
     def write_log(self, text):
+        """text is a string, or an iterator of chunks that is typed as it streams."""
         if self._mode == "chat":
-            self.append_ai_typing(str(text))
+            self.append_ai_typing(text if isinstance(text, Iterator) else str(text))
 
 
     def _modern_icon_button(self, icon, handler):
@@ -465,53 +564,223 @@ class AerisUI:
         )
 
 
+    def _chat_row(self, message_id, role, text):
+        row = self._bubble(text, user=role == "user")
+        row.data = message_id
+        row.key = f"msg-{message_id}"
+        return row
+
+
+    def _message_ids(self):
+        return [c.data for c in self._chat_list.controls if c.data is not None]
+
+
+    def _new_message(self, role, text):
+        """Saves a message to the transcript and returns its bubble."""
+        return self._chat_row(chat_transcript.append(role, text), role, text)
+
+
+    def _show_message(self, row):
+        """Adds a new message's bubble at the bottom of the chat. Runs on the UI side."""
+        if not self._chat_at_end:
+            # Scrolled back in history: jump to the messages just before this one.
+            self._chat_list.controls = [
+                self._chat_row(*r) for r in chat_transcript.before(row.data, CHAT_PAGE)
+            ]
+            if self._chat_loading_ref is not None:
+                self._chat_list.controls.append(self._chat_loading_ref)
+            self._chat_at_end = True
+            self._chat_has_older = True
+
+        controls = self._chat_list.controls
+
+        # The "Thinking..." bubble stays last.
+        if self._chat_loading_ref in controls:
+            controls.insert(controls.index(self._chat_loading_ref), row)
+        else:
+            controls.append(row)
+
+        self._trim_chat(keep_newest=True)
+
+
+    def _trim_chat(self, keep_newest):
+        controls = self._chat_list.controls
+        excess = len(controls) - CHAT_WINDOW
+        if excess <= 0:
+            return
+
+        if keep_newest:
+            del controls[:excess]
+            self._chat_has_older = True
+        else:
+            del controls[-excess:]
+            self._chat_at_end = False
+
+
+    def _show_chat_end(self):
+        self._chat_list.update()
+        self._chat_list.scroll_to(offset=-1, duration=150)
+
+
+    def _on_chat_scroll(self, e):
+        if e.pixels <= e.min_scroll_extent + CHAT_SCROLL_EDGE:
+            self._load_older()
+        elif not self._chat_at_end and e.pixels >= e.max_scroll_extent - CHAT_SCROLL_EDGE:
+            self._load_newer()
+
+
+    def _load_older(self):
+        ids = self._message_ids()
+        if not self._chat_has_older or not ids:
+            return
+
+        rows = chat_transcript.before(ids[0], CHAT_PAGE)
+        if len(rows) < CHAT_PAGE:
+            self._chat_has_older = False
+        if not rows:
+            return
+
+        self._chat_list.controls[0:0] = [self._chat_row(*row) for row in rows]
+        self._trim_chat(keep_newest=False)
+        self._chat_list.update()
+        self._chat_list.scroll_to(key=f"msg-{ids[0]}")
+
+
+    def _load_newer(self):
+        ids = self._message_ids()
+        if not ids:
+            return
+
+        rows = chat_transcript.after(ids[-1], CHAT_PAGE)
+        if len(rows) < CHAT_PAGE:
+            self._chat_at_end = True
+        if not rows:
+            return
+
+        controls = self._chat_list.controls
+        at = controls.index(self._chat_loading_ref) if self._chat_loading_ref in controls else len(controls)
+        controls[at:at] = [self._chat_row(*row) for row in rows]
+        self._trim_chat(keep_newest=True)
+        self._chat_list.update()
+        self._chat_list.scroll_to(key=f"msg-{ids[-1]}")
+
+
     def _switch(self, mode):
         self._mode = mode
         self._live_view.visible = mode == "live"
         self._chat_view.visible = mode == "chat"
         self._page.update()
+        self._request_frame()
+
+
+    def _on_window_event(self, e):
+        event = str(getattr(e, "data", "") or getattr(e, "type", "")).lower()
+
+        if any(name in event for name in ("minimize", "hide")):
+            self._window_hidden = True
+        elif any(name in event for name in ("restore", "show", "maximize", "focus")):
+            self._window_hidden = False
+            self._request_frame()
+
+
+    def _request_frame(self):
+        """Wakes the animation loop early. Safe to call from any thread."""
+        if self._ui_loop is None:
+            return
+        try:
+            self._ui_loop.call_soon_threadsafe(self._frame_event.set)
+        except RuntimeError:
+            pass
+
+
+    async def _wait_for_frame(self, timeout=None):
+        try:
+            await asyncio.wait_for(self._frame_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._frame_event.clear()
+
+
+    def _set_orb_animation(self, duration_ms, curve):
+        if self._orb_animation == (duration_ms, curve):
+            return
+        self._orb_animation = (duration_ms, curve)
+        self._core.animate_scale = ft.Animation(duration_ms, curve)
+        self._glow.animate_scale = ft.Animation(duration_ms, curve)
+        self._glow.animate_opacity = ft.Animation(duration_ms, curve)
+
+
+    def _draw_orb(self, scale, state_boost):
+        self._core.scale = scale
+        self._glow.scale = scale * 1.08
+        self._glow.opacity = 0.08 + state_boost * 0.7
+        self._core.update()
+        self._glow.update()
 
 
     async def _animation_loop(self):
 
+        self._ui_loop = asyncio.get_running_loop()
+        self._frame_event = asyncio.Event()
+
+        shown_state = None
+        drawn_scale = None
+        breath = 1
         last = time.perf_counter()
 
         while self._running:
 
+            if self._mode != "live" or self._window_hidden:
+                await self._wait_for_frame()
+                drawn_scale = None
+                last = time.perf_counter()
+                continue
+
+            state = self._state
+            state_boost = STATE_BOOST.get(state, 0.0)
+
+            if state != shown_state:
+                shown_state = state
+                self._status.value = state.capitalize()
+                self._status.update()
+
             now = time.perf_counter()
-            dt = min(now - last, 0.03)
+            dt = min(now - last, 0.1)
             last = now
 
-            self._smoothed_audio += (
-                self._audio_level - self._smoothed_audio
-            ) * 6 * dt
+            if state not in ACTIVE_STATES:
+                breath = -breath
+                self._current_scale = 1 + state_boost + BREATHE_AMPLITUDE * breath
+                self._smoothed_audio = 0.0
 
-            state_boost = {
-                "idle": 0.0,
-                "listening": 0.15,
-                "processing": 0.18,
-                "speaking": 0.35,
-            }.get(self._state, 0.0)
+                self._set_orb_animation(
+                    int(BREATHE_SECONDS * 1000), ft.AnimationCurve.EASE_IN_OUT
+                )
+                self._draw_orb(self._current_scale, state_boost)
+                drawn_scale = self._current_scale
 
-            t = now - self._start_time
-            breathe = 0.03 * math.sin(t * 1.8)
+                await self._wait_for_frame(BREATHE_SECONDS)
+                continue
 
-            target_scale = 1 + breathe + state_boost + self._smoothed_audio * 0.4
-            self._current_scale += (target_scale - self._current_scale) * 8 * dt
+            self._smoothed_audio += (
+                self._audio_level - self._smoothed_audio
+            ) * min(6 * dt, 1.0)
 
-            self._core.scale = self._current_scale
-            self._glow.scale = self._current_scale * 1.08
-            self._glow.opacity = 0.08 + state_boost * 0.7
+            target_scale = 1 + state_boost + self._smoothed_audio * 0.4
+            self._current_scale += (target_scale - self._current_scale) * min(8 * dt, 1.0)
 
-            self._status.value = self._state.capitalize()
+            if drawn_scale is None or abs(self._current_scale - drawn_scale) >= MIN_SCALE_STEP:
+                self._set_orb_animation(int(1000 / ACTIVE_FPS), ft.AnimationCurve.LINEAR)
+                self._draw_orb(self._current_scale, state_boost)
+                drawn_scale = self._current_scale
 
-            self._page.update()
-            await asyncio.sleep(1 / 60)
+            await self._wait_for_frame(1 / ACTIVE_FPS)
 
 
     def _set_state_threadsafe(self, state):
         def update():
             self._state = state
+            self._request_frame()
         self._safe_ui(update)
 
 
@@ -0,0 +1,89 @@
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from threading import Lock
+
+
+def get_base_dir():
+    if getattr(sys, "frozen", False):
+        return Path(sys.executable).parent
+    return Path(__file__).resolve().parent.parent
+
+
+BASE_DIR = get_base_dir()
+TRANSCRIPT_PATH = BASE_DIR / "memory" / "chat_transcript.db"
+
+
+class ChatTranscript:
+    """
+    Every chat message, on disk. The chat view only keeps a window of
+    bubbles alive and pages the rest in from here by message ID.
+    Empty rows (a streamed reply that never arrived) are skipped.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn = None
+        self._lock = Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    role TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._conn = conn
+        return self._conn
+
+    def append(self, role: str, text: str) -> int:
+        with self._lock:
+            conn = self._connect()
+            cur = conn.execute(
+                "INSERT INTO messages (role, text, created_at) VALUES (?, ?, ?)",
+                (role, text, time.time())
+            )
+            conn.commit()
+            return cur.lastrowid
+
+    def update(self, message_id: int, text: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("UPDATE messages SET text = ? WHERE id = ?", (text, message_id))
+            conn.commit()
+
+    def before(self, message_id: int, limit: int) -> list[tuple]:
+        """Up to limit (id, role, text) rows older than message_id, oldest first."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT id, role, text FROM messages WHERE id < ? AND text != '' ORDER BY id DESC LIMIT ?",
+                (message_id, limit)
+            ).fetchall()
+        return rows[::-1]
+
+    def after(self, message_id: int, limit: int) -> list[tuple]:
+        """Up to limit (id, role, text) rows newer than message_id, oldest first."""
+        with self._lock:
+            return self._connect().execute(
+                "SELECT id, role, text FROM messages WHERE id > ? AND text != '' ORDER BY id LIMIT ?",
+                (message_id, limit)
+            ).fetchall()
+
+    def latest(self, limit: int) -> list[tuple]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT id, role, text FROM messages WHERE text != '' ORDER BY id DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return rows[::-1]
+
+
+chat_transcript = ChatTranscript(TRANSCRIPT_PATH)
@@ -1,5 +1,8 @@
 import json
+import os
 import sys
+import threading
+import time
 from pathlib import Path
 
 def get_base_dir():
@@ -11,6 +14,107 @@ def get_base_dir():
 BASE_DIR = get_base_dir()
 CONFIG_DIR = BASE_DIR / "settings"
 CONFIG_FILE = CONFIG_DIR / "keys.json"
+PROMPT_FILE = BASE_DIR / "engine" / "instructions.txt"
+
+DEFAULT_SYSTEM_PROMPT = "You are Aeris, a helpful AI assistant."
+
+# How often the watcher stats the config files for edits made outside the app.
+CONFIG_POLL_SECONDS = float(os.getenv("AERIS_CONFIG_POLL", "1.0"))
+
+
+class WatchedFile:
+    """
+    In-memory snapshot of a config file.
+
+    get() never touches the disk once loaded; the watcher thread calls
+    refresh(), which re-reads the file only when its mtime or size changed.
+    """
+
+    def __init__(self, path: Path, loader, default):
+        self.path = path
+        self._loader = loader
+        self._default = default
+        self._value = default
+        self._stamp = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _stat(self):
+        try:
+            st = self.path.stat()
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def refresh(self) -> bool:
+        stamp = self._stat()
+
+        with self._lock:
+            if self._loaded and stamp == self._stamp:
+                return False
+
+            value = self._default
+            if stamp is not None:
+                try:
+                    value = self._loader(self.path)
+                except Exception as e:
+                    print(f" Failed to load {self.path.name}: {e}")
+                    if self._loaded:
+                        # Keep the last good snapshot over a half-written edit.
+                        return False
+
+            self._value = value
+            self._stamp = stamp
+            self._loaded = True
+            return True
+
+    def get(self):
+        if not self._loaded:
+            self.refresh()
+            start_config_watcher()
+        return self._value
+
+    def set(self, value) -> None:
+        with self._lock:
+            self._value = value
+            self._stamp = self._stat()
+            self._loaded = True
+
+
+def _read_json(path: Path) -> dict:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return data if isinstance(data, dict) else {}
+
+
+def _read_text(path: Path) -> str:
+    return path.read_text(encoding="utf-8")
+
+
+api_keys = WatchedFile(CONFIG_FILE, _read_json, {})
+system_prompt = WatchedFile(PROMPT_FILE, _read_text, DEFAULT_SYSTEM_PROMPT)
+
+_watched = (api_keys, system_prompt)
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def _watch_loop() -> None:
+    while True:
+        time.sleep(CONFIG_POLL_SECONDS)
+        for watched in _watched:
+            if watched.refresh():
+                print(f" Reloaded {watched.path.name}")
+
+
+def start_config_watcher() -> None:
+    global _watcher
+
+    with _watcher_lock:
+        if _watcher is not None:
+            return
+        _watcher = threading.Thread(target=_watch_loop, name="config-watcher", daemon=True)
+        _watcher.start()
+
 
 def ensure_config_dir() -> None:
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
@@ -24,19 +128,13 @@ def save_api_keys(
     serpapi_api_key: str | None = None
 ) -> None:
     """
-    Saves API keys into config/api_keys.json
+    Saves API keys into settings/keys.json
     Only overwrites keys that are provided.
     """
 
     ensure_config_dir()
 
-    data: dict = {}
-
-    if CONFIG_FILE.exists():
-        try:
-            data = json.loads(CONFIG_FILE.read_text(encoding="utf-8"))
-        except Exception:
-            data = {}
+    data = dict(api_keys.get())
 
     if openrouter_api_key is not None:
         data["openrouter_api_key"] = openrouter_api_key.strip()
@@ -44,27 +142,28 @@ def save_api_keys(
     if serpapi_api_key is not None:
         data["serpapi_api_key"] = serpapi_api_key.strip()
 
-    CONFIG_FILE.write_text(
-        json.dumps(data, indent=2),
-        encoding="utf-8"
-    )
+    tmp = CONFIG_FILE.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, CONFIG_FILE)
 
-def load_api_keys() -> dict:
-    if not CONFIG_FILE.exists():
-        return {}
+    api_keys.set(data)
 
-    try:
-        return json.loads(CONFIG_FILE.read_text(encoding="utf-8"))
-    except Exception as e:
-        print(f"❌ Failed to load api_keys.json: {e}")
-        return {}
+def load_api_keys() -> dict:
+    return dict(api_keys.get())
 
 def get_openrouter_key() -> str | None:
-    return load_api_keys().get("openrouter_api_key")
+    return api_keys.get().get("openrouter_api_key")
 
 
 def get_serpapi_key() -> str | None:
-    return load_api_keys().get("serpapi_api_key")
+    return api_keys.get().get("serpapi_api_key")
+
+
+def get_system_prompt() -> str:
+    return system_prompt.get()
 
 def is_openrouter_configured() -> bool:
     key = get_openrouter_key()
@@ -0,0 +1,185 @@
+import re
+import sqlite3
+import sys
+from pathlib import Path
+from threading import Lock
+
+from prompt_builder import count_tokens
+
+
+def get_base_dir():
+    if getattr(sys, "frozen", False):
+        return Path(sys.executable).parent
+    return Path(__file__).resolve().parent.parent
+
+
+BASE_DIR = get_base_dir()
+FACTS_PATH = BASE_DIR / "memory" / "facts.db"
+
+DEFAULT_TOP_K = 8
+DEFAULT_TOKEN_BUDGET = 160
+
+# Always sent, whatever the utterance is about.
+PINNED_PATHS = ("identity.name",)
+
+_STOPWORDS = {
+    "a", "an", "the", "is", "are", "am", "was", "be", "to", "of", "in", "on", "at", "for",
+    "and", "or", "do", "does", "did", "what", "whats", "who", "how", "can", "could",
+    "would", "you", "your", "me", "i", "it", "this", "that", "please", "aeris", "hey",
+}
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _terms(text: str) -> list[str]:
+    return [w for w in _WORD.findall(text.lower().replace("_", " ")) if w not in _STOPWORDS]
+
+
+def flatten_facts(memory: dict, path: str = ""):
+    """Yields (path, value, updated_at) for every leaf fact of the nested memory dict."""
+    for key, value in memory.items():
+        key_path = f"{path}.{key}" if path else key
+
+        if isinstance(value, dict) and "value" in value:
+            yield key_path, value["value"], value.get("updated_at")
+        elif isinstance(value, dict):
+            yield from flatten_facts(value, key_path)
+
+
+def format_fact(fact: dict) -> str:
+    return f"{fact['path'].replace('_', ' ')}: {fact['value']}"
+
+
+class FactStore:
+    """
+    Long-term facts indexed for retrieval.
+
+    memory.json stays the source of truth; this is an index over it,
+    with one row per leaf fact and an FTS5 table (or LIKE scans where the
+    SQLite build lacks FTS5) so only the facts relevant to an utterance
+    end up in the prompt.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.fts = False
+        self._conn = None
+        self._lock = Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS facts (
+                    path TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    updated_at TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS facts_updated ON facts(updated_at)")
+
+            try:
+                conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS facts_fts USING fts5(path UNINDEXED, body)")
+                self.fts = True
+            except sqlite3.OperationalError:
+                print(" SQLite has no FTS5, fact retrieval falls back to LIKE")
+
+            self._conn = conn
+        return self._conn
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._connect().execute("SELECT 1 FROM facts LIMIT 1").fetchone() is None
+
+    def upsert(self, facts) -> None:
+        """facts: iterable of (path, value, updated_at)."""
+        with self._lock:
+            conn = self._connect()
+            for path, value, updated_at in facts:
+                value = str(value)
+                body = " ".join(_terms(path)) + " " + value
+                conn.execute(
+                    "INSERT OR REPLACE INTO facts (path, value, body, updated_at) VALUES (?, ?, ?, ?)",
+                    (path, value, body, updated_at)
+                )
+                if self.fts:
+                    conn.execute("DELETE FROM facts_fts WHERE path = ?", (path,))
+                    conn.execute("INSERT INTO facts_fts (path, body) VALUES (?, ?)", (path, body))
+            conn.commit()
+
+    def rebuild(self, memory: dict) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM facts")
+            if self.fts:
+                conn.execute("DELETE FROM facts_fts")
+            conn.commit()
+        self.upsert(flatten_facts(memory))
+
+    def _search(self, conn: sqlite3.Connection, terms: list[str], limit: int) -> list[tuple]:
+        if not terms:
+            return []
+
+        if self.fts:
+            match = " OR ".join(f'"{t}"*' for t in terms)
+            return conn.execute(
+                "SELECT f.path, f.value, f.updated_at FROM facts_fts "
+                "JOIN facts f ON f.path = facts_fts.path "
+                "WHERE facts_fts MATCH ? "
+                "ORDER BY bm25(facts_fts), f.updated_at DESC LIMIT ?",
+                (match, limit)
+            ).fetchall()
+
+        score = " + ".join("(body LIKE ?)" for _ in terms)
+        return conn.execute(
+            f"SELECT path, value, updated_at FROM facts WHERE ({score}) > 0 "
+            f"ORDER BY ({score}) DESC, updated_at DESC LIMIT ?",
+            [f"%{t}%" for t in terms] * 2 + [limit]
+        ).fetchall()
+
+    def retrieve(self, query: str, k: int = DEFAULT_TOP_K, token_budget: int = DEFAULT_TOKEN_BUDGET) -> list[dict]:
+        """
+        Returns up to k facts relevant to the utterance, pinned facts first,
+        stopping before the formatted facts would exceed token_budget.
+        """
+        with self._lock:
+            conn = self._connect()
+
+            rows = conn.execute(
+                f"SELECT path, value, updated_at FROM facts WHERE path IN ({','.join('?' * len(PINNED_PATHS))})",
+                PINNED_PATHS
+            ).fetchall()
+
+            try:
+                rows += self._search(conn, _terms(query), k)
+            except sqlite3.OperationalError as e:
+                print(f" Fact search failed: {e}")
+
+        facts = []
+        seen = set()
+        used = 0
+
+        for path, value, updated_at in rows:
+            if path in seen or len(facts) >= k:
+                continue
+
+            fact = {"path": path, "value": value, "updated_at": updated_at}
+            cost = count_tokens(format_fact(fact))
+            if used + cost > token_budget:
+                break
+
+            seen.add(path)
+            facts.append(fact)
+            used += cost
+
+        return facts
+
+
+fact_store = FactStore(FACTS_PATH)
+
+
+def retrieve_facts(query: str, k: int = DEFAULT_TOP_K, token_budget: int = DEFAULT_TOKEN_BUDGET) -> list[dict]:
+    return fact_store.retrieve(query, k, token_budget)
@@ -1,10 +1,35 @@
+import atexit
+import copy
 import json
 import os
+import queue
+import sys
+import threading
+from pathlib import Path
 from threading import Lock
 from datetime import datetime
 
-MEMORY_PATH = "memory/memory.json"
+from memory.fact_store import fact_store, flatten_facts
+from memory.response_cache import response_cache
+
+
+def get_base_dir():
+    if getattr(sys, "frozen", False):
+        return Path(sys.executable).parent
+    return Path(__file__).resolve().parent.parent
+
+
+BASE_DIR = get_base_dir()
+MEMORY_PATH = BASE_DIR / "memory" / "memory.json"
+JOURNAL_PATH = BASE_DIR / "memory" / "memory.journal"
+
+# Journal records folded into memory.json before the journal is truncated.
+COMPACT_EVERY = int(os.getenv("AERIS_MEMORY_COMPACT_EVERY", "32"))
+
 _lock = Lock()
+_snapshot = None
+_writer = None
+_pending = queue.Queue()
 
 
 def _empty_memory() -> dict:
@@ -17,66 +42,228 @@ def _empty_memory() -> dict:
     }
 
 
+def _read_disk() -> tuple[dict, list]:
+    """
+    Load memory.json and replay the journal written since the last compaction.
+    Also returns the paths the replay changed.
+    """
+    memory = _empty_memory()
+    replayed = []
+
+    if MEMORY_PATH.exists():
+        try:
+            data = json.loads(MEMORY_PATH.read_text(encoding="utf-8"))
+            if isinstance(data, dict):
+                memory = data
+        except Exception as e:
+            print(f" Failed to read memory.json: {e}")
+
+    if JOURNAL_PATH.exists():
+        with open(JOURNAL_PATH, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash mid-append.
+                    break
+                if "replace" in record:
+                    memory = record["replace"]
+                    replayed = [path for path, _, _ in flatten_facts(memory)]
+                else:
+                    _recursive_update(memory, record.get("update") or {}, changed_paths=replayed, now=record.get("at"))
+
+    return memory, replayed
+
+
+def _get_path(memory: dict, path: str):
+    node = memory
+    for key in path.split("."):
+        node = node.get(key) if isinstance(node, dict) else None
+    return node or {}
+
+
+def _changed_facts(memory: dict, paths: list) -> list:
+    facts = []
+    for path in paths:
+        entry = _get_path(memory, path)
+        facts.append((path, entry.get("value"), entry.get("updated_at")))
+    return facts
+
+
 def load_memory() -> dict:
-    """Load memory from disk, return empty if not exists or invalid."""
-    if not os.path.exists(MEMORY_PATH):
-        return _empty_memory()
+    """
+    Return the current memory snapshot.
+
+    Snapshots are never mutated after publication, treat them as read-only;
+    writers copy, modify and swap in a new one.
+    """
+    global _snapshot
+
+    if _snapshot is None:
+        with _lock:
+            if _snapshot is None:
+                memory, replayed = _read_disk()
+
+                try:
+                    if fact_store.is_empty():
+                        fact_store.rebuild(memory)
+                    elif replayed:
+                        fact_store.upsert(_changed_facts(memory, replayed))
+                except Exception as e:
+                    print(f" Fact index sync failed: {e}")
+
+                _snapshot = memory
+
+    return _snapshot
+
+
+def _write_atomic(memory: dict) -> None:
+    MEMORY_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = MEMORY_PATH.with_suffix(".json.tmp")
+
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(memory, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp, MEMORY_PATH)
+
+
+def _journal_loop() -> None:
+    """
+    Write-behind persistence: appends each change to the journal with an
+    fsync, then mirrors it into the fact index. Every COMPACT_EVERY records
+    memory.json is rewritten atomically from the snapshot that followed the
+    last journaled change.
+    """
+    journaled = 0
+
+    while True:
+        item = _pending.get()
 
-    with _lock:
         try:
-            with open(MEMORY_PATH, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                if isinstance(data, dict):
-                    return data
-                return _empty_memory()
-        except Exception:
-            return _empty_memory()
+            record, snapshot, facts, done = item
+
+            if record is not None:
+                JOURNAL_PATH.parent.mkdir(parents=True, exist_ok=True)
+                with open(JOURNAL_PATH, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                journaled += 1
+
+                if facts is None:
+                    fact_store.rebuild(snapshot)
+                else:
+                    fact_store.upsert(facts)
+
+            if journaled and (journaled >= COMPACT_EVERY or record is None):
+                _write_atomic(snapshot)
+                with open(JOURNAL_PATH, "w", encoding="utf-8") as f:
+                    f.flush()
+                    os.fsync(f.fileno())
+                journaled = 0
+
+        except Exception as e:
+            print(f" Memory journal write failed: {e}")
+
+        finally:
+            if item[3] is not None:
+                item[3].set()
+            _pending.task_done()
+
+
+def _enqueue(record: dict | None, snapshot: dict, facts: list | None = None, wait: bool = False) -> None:
+    global _writer
+
+    if _writer is None:
+        _writer = threading.Thread(target=_journal_loop, name="memory-journal", daemon=True)
+        _writer.start()
+
+    done = threading.Event() if wait else None
+    _pending.put((record, snapshot, facts, done))
+
+    if done:
+        done.wait()
+
+
+def flush_memory() -> None:
+    """Block until every pending change is journaled and fold the journal into memory.json."""
+    if _writer is None:
+        return
+    _enqueue(None, load_memory(), [], wait=True)
+
+
+atexit.register(flush_memory)
 
 
 def save_memory(memory: dict) -> None:
-    """Save memory to disk safely."""
+    """Replace the whole memory and persist it."""
+    global _snapshot
+
     if not isinstance(memory, dict):
         return
 
-    os.makedirs(os.path.dirname(MEMORY_PATH), exist_ok=True)
-
     with _lock:
-        with open(MEMORY_PATH, "w", encoding="utf-8") as f:
-            json.dump(memory, f, indent=2, ensure_ascii=False)
+        _snapshot = copy.deepcopy(memory)
+        _enqueue({"replace": _snapshot}, _snapshot)
 
 
-def _recursive_update(target: dict, updates: dict) -> bool:
-    """Recursively merge updates into target memory. Returns True if changed."""
+def _recursive_update(
+    target: dict,
+    updates: dict,
+    path: str = "",
+    changed_paths: list | None = None,
+    now: str | None = None
+) -> bool:
+    """Recursively merge updates into target memory, stamping changed facts. Returns True if changed."""
     changed = False
-    now = datetime.utcnow().isoformat() + "Z"
+    now = now or datetime.utcnow().isoformat() + "Z"
 
     for key, value in updates.items():
         if value is None or (isinstance(value, str) and not value.strip()):
             continue
 
+        key_path = f"{path}.{key}" if path else key
+
         if isinstance(value, dict) and "value" not in value:
             if key not in target or not isinstance(target[key], dict):
                 target[key] = {}
                 changed = True
-            if _recursive_update(target[key], value):
+            if _recursive_update(target[key], value, key_path, changed_paths, now):
                 changed = True
         else:
 
-            entry = value if isinstance(value, dict) and "value" in value else {"value": value}
-            if key not in target or target[key] != entry:
+            entry = dict(value) if isinstance(value, dict) and "value" in value else {"value": value}
+            current = target.get(key)
+            if not isinstance(current, dict) or current.get("value") != entry["value"]:
+                entry["updated_at"] = now
                 target[key] = entry
                 changed = True
+                if changed_paths is not None:
+                    changed_paths.append(key_path)
 
     return changed
 
 
 def update_memory(memory_update: dict) -> dict:
     """Merge LLM memory update into global memory and save."""
+    global _snapshot
+
     if not isinstance(memory_update, dict):
         return load_memory()
 
-    memory = load_memory()
-    if _recursive_update(memory, memory_update):
-        save_memory(memory)
+    current = load_memory()
+    changed_paths = []
+    now = datetime.utcnow().isoformat() + "Z"
+
+    with _lock:
+        memory = copy.deepcopy(_snapshot)
+        if not _recursive_update(memory, memory_update, changed_paths=changed_paths, now=now):
+            return current
+
+        _snapshot = memory
+        _enqueue({"update": memory_update, "at": now}, memory, _changed_facts(memory, changed_paths))
 
+    response_cache.invalidate(changed_paths)
     return memory
@@ -0,0 +1,262 @@
+import json
+import re
+import sqlite3
+import sys
+import time
+import hashlib
+from pathlib import Path
+from threading import Lock
+
+
+def get_base_dir():
+    if getattr(sys, "frozen", False):
+        return Path(sys.executable).parent
+    return Path(__file__).resolve().parent.parent
+
+
+BASE_DIR = get_base_dir()
+CACHE_PATH = BASE_DIR / "memory" / "response_cache.db"
+
+CACHE_TTL_SECONDS = 6 * 3600
+CACHE_MAX_ENTRIES = 500
+
+# Only the LLM's decision is cached, the action itself still runs.
+# send_message and anything that asks a question back is never replayed.
+CACHEABLE_INTENTS = {"chat", "open_app", "weather_report", "search"}
+
+_CONTRACTIONS = {
+    "what's": "what is",
+    "who's": "who is",
+    "how's": "how is",
+    "where's": "where is",
+    "you're": "you are",
+    "i'm": "i am",
+    "it's": "it is",
+    "whats": "what is",
+    "hows": "how is",
+}
+
+_FILLERS = {"hey", "hi", "aeris", "please", "ok", "okay", "so", "um", "uh", "well", "just", "sir"}
+
+# Follow-ups ("why did he do that?") depend on the conversation and
+# time-bound questions on the clock, neither is answered from cache.
+_UNCACHEABLE_WORDS = {
+    "he", "she", "him", "her", "they", "them", "it", "that", "this", "those", "these",
+    "why", "again", "also", "and", "then", "more", "else",
+    "time", "date", "now", "today", "tonight", "tomorrow", "yesterday", "latest", "news",
+}
+
+# Replies to the previous turn ("yes", "the second one", "what about
+# paris") mean nothing on their own.
+CACHE_MIN_WORDS = 3
+_FOLLOW_UP_STARTS = (
+    "yes", "yeah", "yep", "no", "nope", "sure", "okay", "alright", "go ahead", "do it",
+    "what about", "how about", "and", "but", "or",
+    "the first", "the second", "the third", "the last", "the other", "the next", "the previous",
+)
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def normalize_query(text: str) -> str | None:
+    """
+    Canonical form used as the cache key, so "What's your name?" and
+    "hey aeris, what is your name" share an entry.
+    Returns None when the utterance shouldn't be cached at all.
+    """
+    words = []
+    for word in _WORD.findall((text or "").lower()):
+        words.extend(_CONTRACTIONS.get(word, word).split())
+
+    words = [w for w in words if w not in _FILLERS]
+
+    if len(words) < CACHE_MIN_WORDS or any(w in _UNCACHEABLE_WORDS for w in words):
+        return None
+
+    query = " ".join(words)
+    if any(query == start or query.startswith(start + " ") for start in _FOLLOW_UP_STARTS):
+        return None
+
+    return query
+
+
+def is_cacheable(result: dict, query: str | None = None) -> bool:
+    if not result or result.get("intent") not in CACHEABLE_INTENTS:
+        return False
+
+    if query is not None and normalize_query(query) is None:
+        return False
+
+    if result.get("needs_clarification"):
+        return False
+
+    update = result.get("memory_update")
+    if isinstance(update, dict) and any(update.values()):
+        return False
+
+    return bool(result.get("text") or result.get("intent") != "chat")
+
+
+class ResponseCache:
+    """
+    SQLite-backed LLM response cache with TTL and LRU eviction.
+
+    Every entry records which memory paths ("identity.name") its prompt
+    included, so invalidate() can drop exactly the answers that depended
+    on facts that just changed.
+    """
+
+    def __init__(self, path: Path, ttl: float = CACHE_TTL_SECONDS, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._conn = None
+        self._lock = Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used);
+                CREATE TABLE IF NOT EXISTS dependencies (
+                    path TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    PRIMARY KEY (path, key)
+                );
+                CREATE INDEX IF NOT EXISTS dependencies_key ON dependencies(key);
+            """)
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def make_key(query: str, system_prompt: str, memory_slice: dict | None = None) -> str:
+        """
+        The conversation isn't part of the key: normalize_query() already
+        refuses queries that lean on it (pronouns, "what about ...").
+        """
+        material = json.dumps(
+            {
+                "query": query,
+                "prompt": hashlib.sha256(system_prompt.encode("utf-8")).hexdigest(),
+                "memory": memory_slice or {},
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        now = time.time()
+
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT response, created_at FROM responses WHERE key = ?",
+                    (key,)
+                ).fetchone()
+
+                if row is None:
+                    return None
+
+                if now - row[1] > self.ttl:
+                    self._delete(conn, [key])
+                    conn.commit()
+                    return None
+
+                conn.execute(
+                    "UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                    (now, key)
+                )
+                conn.commit()
+                return json.loads(row[0])
+            except Exception as e:
+                print(f" Response cache read failed: {e}")
+                return None
+
+    def put(self, key: str, query: str, response: dict, depends_on: list[str] | None = None) -> None:
+        now = time.time()
+
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, query, response, created_at, last_used, hits) "
+                    "VALUES (?, ?, ?, ?, ?, 0)",
+                    (key, query, json.dumps(response, ensure_ascii=False), now, now)
+                )
+                conn.execute("DELETE FROM dependencies WHERE key = ?", (key,))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO dependencies (path, key) VALUES (?, ?)",
+                    [(path, key) for path in depends_on or []]
+                )
+                self._evict(conn, now)
+                conn.commit()
+            except Exception as e:
+                print(f" Response cache write failed: {e}")
+
+    def invalidate(self, paths: list[str]) -> int:
+        """
+        Drops every entry that depended on one of the given memory paths,
+        on one of their parents or on one of their children.
+        """
+        if not paths:
+            return 0
+
+        with self._lock:
+            try:
+                conn = self._connect()
+                keys = set()
+                for path in paths:
+                    rows = conn.execute(
+                        "SELECT key FROM dependencies "
+                        "WHERE path = ? OR path LIKE ? || '.%' OR ? LIKE path || '.%'",
+                        (path, path, path)
+                    ).fetchall()
+                    keys.update(row[0] for row in rows)
+
+                self._delete(conn, list(keys))
+                conn.commit()
+                return len(keys)
+            except Exception as e:
+                print(f" Response cache invalidation failed: {e}")
+                return 0
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.execute("DELETE FROM dependencies")
+            conn.commit()
+
+    def _delete(self, conn: sqlite3.Connection, keys: list[str]) -> None:
+        for key in keys:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            conn.execute("DELETE FROM dependencies WHERE key = ?", (key,))
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        expired = conn.execute(
+            "SELECT key FROM responses WHERE created_at < ?",
+            (now - self.ttl,)
+        ).fetchall()
+
+        overflow = conn.execute(
+            "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?",
+            (self.max_entries,)
+        ).fetchall()
+
+        self._delete(conn, [row[0] for row in expired + overflow])
+
+
+response_cache = ResponseCache(CACHE_PATH)
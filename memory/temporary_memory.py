@@ -1,5 +1,23 @@
+import threading
+import time
+from collections import deque
 from typing import Any
 
+from prompt_builder import count_tokens, summarize_turns
+
+
+class Turn:
+    """One conversation entry: a user message, an AI reply or a tool result."""
+
+    __slots__ = ("role", "text", "intent", "timestamp", "tokens")
+
+    def __init__(self, role: str, text: str, intent: str | None = None):
+        self.role = role
+        self.text = text
+        self.intent = intent
+        self.timestamp = time.time()
+        self.tokens = count_tokens(text)
+
 
 class TemporaryMemory:
     """
@@ -14,8 +32,10 @@ class TemporaryMemory:
           "why did he executed?"
     """
 
-    def __init__(self, max_history: int = 5):
+    def __init__(self, max_history: int = 20):
         self.max_history = max_history
+        # History is read from the prefetch thread while turns add to it.
+        self._history_lock = threading.RLock()
         self.reset()
 
 
@@ -30,7 +50,10 @@ class TemporaryMemory:
         self.last_search: dict | None = None   
         self.last_opened_app: str | None = None
 
-        self.conversation_history: list[dict[str, str]] = []
+        with self._history_lock:
+            self.conversation_history: deque[Turn] = deque(maxlen=self.max_history)
+            self.summary: str | None = None
+            self._history_tokens = 0
 
 
     def set_pending_intent(self, intent: str):
@@ -67,13 +90,16 @@ class TemporaryMemory:
     def clear_current_question(self):
         self.current_question = None
 
-    def set_last_user_text(self, text: str):
+    def set_last_user_text(self, text: str, intent: str | None = None):
         self.last_user_text = text
-        self._add_to_history("user", text)
+        self._add_to_history("user", text, intent)
 
-    def set_last_ai_response(self, text: str):
+    def set_last_ai_response(self, text: str, intent: str | None = None):
         self.last_ai_response = text
-        self._add_to_history("ai", text)
+        self._add_to_history("ai", text, intent)
+
+    def add_tool_result(self, intent: str, text: str):
+        self._add_to_history("tool", text, intent)
 
     def get_last_user_text(self):
         return self.last_user_text
@@ -87,35 +113,66 @@ class TemporaryMemory:
             "query": query,
             "answer": answer
         }
+        self.add_tool_result("search", f"{query} -> {answer}")
 
     def get_last_search(self):
         return self.last_search
 
     def set_open_app(self, app_name: str):
         self.last_opened_app = app_name
+        self.add_tool_result("open_app", f"opened {app_name}")
 
     def get_last_opened_app(self):
         return self.last_opened_app
 
-    def _add_to_history(self, role: str, text: str):
-        if role not in ("user", "ai"):
+    def _add_to_history(self, role: str, text: str, intent: str | None = None):
+        if role not in ("user", "ai", "tool") or not text:
             return
 
-        self.conversation_history.append({
-            "role": role,
-            "text": text
-        })
+        turn = Turn(role, text, intent)
+
+        with self._history_lock:
+            if len(self.conversation_history) == self.max_history:
+                self._fold_oldest()
+
+            self.conversation_history.append(turn)
+            self._history_tokens += turn.tokens
+
+    def _fold_oldest(self):
+        turn = self.conversation_history.popleft()
+        self._history_tokens -= turn.tokens
+        self.summary = summarize_turns([turn], self.summary)
+
+    def compact_history(self, token_budget: int) -> None:
+        """
+        Folds the oldest turns into the rolling summary until the
+        remaining history fits token_budget.
+        """
+        with self._history_lock:
+            while self.conversation_history and self._history_tokens > token_budget:
+                self._fold_oldest()
+
+    def snapshot_history(self, token_budget: int) -> tuple[str | None, list[Turn]]:
+        """
+        Compacts to token_budget and returns (summary, turns) as one
+        consistent copy, safe to use from any thread.
+        """
+        with self._history_lock:
+            self.compact_history(token_budget)
+            return self.summary, list(self.conversation_history)
 
-        if len(self.conversation_history) > self.max_history:
-            self.conversation_history.pop(0)
+    def get_history_turns(self) -> list[Turn]:
+        with self._history_lock:
+            return list(self.conversation_history)
 
     def get_history_for_prompt(self) -> str:
         """
-        Returns compact history for LLM prompt.
+        Returns compact history as text, for debugging.
+        Prompts are built from snapshot_history() instead.
         """
         return "\n".join(
-            f"{m['role'].capitalize()}: {m['text']}"
-            for m in self.conversation_history
+            f"{f'Tool ({t.intent})' if t.role == 'tool' else t.role.capitalize()}: {t.text}"
+            for t in self.get_history_turns()
         )
 
 
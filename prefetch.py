@@ -0,0 +1,232 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+
+# How long a partial hypothesis must stay unchanged before it's sent.
+STABLE_MS = int(os.getenv("AERIS_PREFETCH_STABLE_MS", "350"))
+MIN_WORDS = 2
+CLAIM_TIMEOUT = 30
+# How often a claimed prefetch checks whether its turn was cancelled.
+CLAIM_POLL = 0.05
+
+
+def _canonical(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+
+class EventRecorder:
+    """
+    Takes the fetch's on_text/on_field callbacks before anyone claims it.
+    Events are kept until attach(), replayed there in order, and
+    forwarded as they come from then on.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = []
+        self._on_text = None
+        self._on_field = None
+        self._attached = False
+
+    def on_text(self, delta):
+        self._emit(("text", delta))
+
+    def on_field(self, name, value):
+        self._emit(("field", name, value))
+
+    def _emit(self, event):
+        with self._lock:
+            if self._attached:
+                self._forward(event)
+            else:
+                self._events.append(event)
+
+    def _forward(self, event):
+        if event[0] == "text" and self._on_text:
+            self._on_text(event[1])
+        elif event[0] == "field" and self._on_field:
+            self._on_field(event[1], event[2])
+
+    def attach(self, on_text=None, on_field=None):
+        with self._lock:
+            self._on_text = on_text
+            self._on_field = on_field
+            self._attached = True
+            for event in self._events:
+                self._forward(event)
+            self._events = []
+
+
+class SpeculativePrefetcher:
+    """
+    Starts the LLM request while the user is still talking.
+
+    record_voice() feeds every partial Vosk hypothesis to on_partial().
+    Once one has been stable for STABLE_MS,
+    fetch(text, cancel_event, on_text, on_field) runs in the background,
+    its streamed events recorded. claim(final_text, ...) replays them into
+    the turn's own callbacks and hands the answer over when the final
+    transcript matches, otherwise the request is cancelled. A turn
+    that is handled without the LLM must call reset() instead, or the
+    request keeps running.
+
+    fetch must be side-effect free: only the LLM decision is prefetched,
+    the action itself runs after claim(). It runs on a worker thread, so
+    any shared state it reads must be snapshotted under a lock.
+    """
+
+    def __init__(self, fetch, should_prefetch=None, stable_ms: int = STABLE_MS):
+        self.fetch = fetch
+        self.should_prefetch = should_prefetch
+        self.stable_ms = stable_ms
+
+        self.stats = {"fired": 0, "hits": 0, "misses": 0, "wasted": 0, "saved_ms": 0.0}
+
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._partial = ""
+        self._changed_at = 0.0
+        self._text = None
+        self._future = None
+        self._cancel = None
+        self._recorder = None
+        self._fired_at = 0.0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._discard()
+            self._partial = ""
+            self._changed_at = 0.0
+
+    def _discard(self) -> None:
+        if self._future is None:
+            return
+        self._cancel.set()
+        self._future.cancel()
+        self.stats["wasted"] += 1
+        self._future = None
+        self._text = None
+        self._recorder = None
+
+    def on_partial(self, text: str) -> None:
+        text = _canonical(text)
+        now = time.perf_counter()
+
+        with self._lock:
+            if text != self._partial:
+                self._partial = text
+                self._changed_at = now
+                if self._future is not None and text != self._text:
+                    self._discard()
+                return
+
+            if (
+                self._future is not None
+                or len(text.split()) < MIN_WORDS
+                or (now - self._changed_at) * 1000 < self.stable_ms
+            ):
+                return
+
+            if self.should_prefetch and not self.should_prefetch(text):
+                return
+
+            self._text = text
+            self._cancel = threading.Event()
+            self._recorder = EventRecorder()
+            self._fired_at = now
+            self._future = self._executor.submit(
+                self.fetch, text, self._cancel, self._recorder.on_text, self._recorder.on_field
+            )
+            self.stats["fired"] += 1
+
+        print(f" Prefetch: {text!r}")
+
+    def claim(
+        self,
+        final_text: str,
+        on_text=None,
+        on_field=None,
+        cancel_event: threading.Event | None = None,
+        timeout: float = CLAIM_TIMEOUT
+    ) -> dict | None:
+        """
+        Returns the prefetched answer for final_text, or None when nothing
+        usable was prefetched (the caller then makes the request itself).
+
+        On a match, what the request streamed so far is replayed into
+        on_text/on_field and the rest is forwarded live. The request stays
+        cancellable while it's awaited: by reset(), or by cancel_event.
+        """
+        with self._lock:
+            future: Future | None = self._future
+            cancel = self._cancel
+            recorder = self._recorder
+            fired_at = self._fired_at
+            matched = future is not None and self._text == _canonical(final_text)
+
+            if future is not None and not matched:
+                self.stats["misses"] += 1
+                self._discard()
+                missed = True
+            else:
+                missed = False
+
+            self._partial = ""
+
+        if missed:
+            self.report()
+
+        if not matched:
+            return None
+
+        recorder.attach(on_text, on_field)
+        waited_from = time.perf_counter()
+        deadline = waited_from + timeout
+
+        try:
+            while True:
+                try:
+                    result = future.result(timeout=CLAIM_POLL)
+                    break
+                except FutureTimeout:
+                    pass
+
+                turn_cancelled = cancel_event is not None and cancel_event.is_set()
+                if cancel.is_set() or turn_cancelled or time.perf_counter() > deadline:
+                    with self._lock:
+                        if self._future is future:
+                            self._discard()
+                    return None
+        except Exception as e:
+            if not cancel.is_set():
+                print(f" Prefetch failed: {e}")
+                self.stats["wasted"] += 1
+            return None
+        finally:
+            with self._lock:
+                if self._future is future:
+                    self._future = None
+                    self._text = None
+                    self._recorder = None
+
+        if result is None:
+            return None
+
+        self.stats["hits"] += 1
+        self.stats["saved_ms"] += (waited_from - fired_at) * 1000
+        self.report()
+        return result
+
+    def hit_rate(self) -> float:
+        used = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / used if used else 0.0
+
+    def report(self) -> None:
+        s = self.stats
+        print(
+            f" Prefetch stats: {s['hits']} hits, {s['misses']} misses, "
+            f"{s['wasted']} wasted of {s['fired']} fired "
+            f"(hit rate {self.hit_rate():.0%}, {s['saved_ms']:.0f} ms overlapped)"
+        )
@@ -0,0 +1,142 @@
+import json
+import os
+import re
+
+
+# Total tokens a turn may use, prompt and completion together.
+TURN_TOKEN_BUDGET = int(os.getenv("AERIS_TURN_TOKENS", "2500"))
+# Upper bound for the prompt itself; history is folded to stay under it.
+PROMPT_TOKEN_BUDGET = int(os.getenv("AERIS_PROMPT_TOKENS", "1800"))
+HISTORY_TOKEN_BUDGET = 600
+SUMMARY_TOKEN_BUDGET = 150
+
+MAX_RESPONSE_TOKENS = 500
+MIN_RESPONSE_TOKENS = 150
+
+# Chat-format overhead per message (role markers, separators).
+MESSAGE_OVERHEAD = 4
+
+_PIECE = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Local approximation of a BPE tokenizer: short words are one token,
+    longer ones roughly one per 6 letters, digits in groups of three and
+    every symbol on its own. Within ~15% of the real count on English.
+    """
+    if not text:
+        return 0
+
+    tokens = 0
+    for piece in _PIECE.findall(text):
+        tokens += 1 + (len(piece) - 1) // 6 if piece[0].isalpha() else 1
+    return tokens
+
+
+def count_message_tokens(messages: list[dict]) -> int:
+    return sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD for m in messages)
+
+
+def _first_sentence(text: str, limit: int = 120) -> str:
+    text = " ".join((text or "").split())
+    match = re.match(r"(.+?[.!?])(\s|$)", text)
+    sentence = match.group(1) if match else text
+    return sentence if len(sentence) <= limit else sentence[:limit].rsplit(" ", 1)[0] + "..."
+
+
+def summarize_turns(turns: list, previous: str | None = None, max_tokens: int = SUMMARY_TOKEN_BUDGET) -> str:
+    """
+    Folds turns into the rolling summary, one short line per exchange.
+    Extractive on purpose: no extra LLM call on the hot path. When the
+    summary outgrows max_tokens its oldest lines are dropped.
+    """
+    lines = previous.splitlines() if previous else []
+
+    for turn in turns:
+        if turn.role == "tool":
+            who = f"Tool ({turn.intent})"
+        else:
+            who = "User" if turn.role == "user" else "Aeris"
+        sentence = _first_sentence(turn.text)
+        if sentence:
+            lines.append(f"{who}: {sentence}")
+
+    while lines and count_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+
+    return "\n".join(lines)
+
+
+def _turn_message(turn) -> dict:
+    """
+    Past replies are replayed in the same JSON envelope the model must
+    answer with, so prose history doesn't pull it off the format; tool
+    results are context, not something the model said.
+    """
+    if turn.role == "user":
+        return {"role": "user", "content": f'User message: "{turn.text}"'}
+    if turn.role == "tool":
+        return {"role": "system", "content": f"Result of {turn.intent}: {turn.text}"}
+
+    envelope = {
+        "intent": turn.intent or "chat",
+        "parameters": {},
+        "needs_clarification": False,
+        "text": turn.text,
+        "memory_update": {},
+    }
+    return {"role": "assistant", "content": json.dumps(envelope, ensure_ascii=False)}
+
+
+def build_prompt(user_text: str, system_prompt: str, memory_block: dict | None = None) -> dict:
+    """
+    Builds the chat messages for one turn.
+
+    The system prompt and the sorted long-term facts go first, so turns
+    sharing them share a byte-identical prefix that provider-side prompt
+    caching can reuse; the summary, the recent turns and the new message
+    follow.
+    Oldest turns are folded into the summary until the prompt fits
+    PROMPT_TOKEN_BUDGET.
+
+    Returns {"messages", "prompt_tokens", "max_tokens"}.
+    """
+    memory_block = memory_block or {}
+
+    facts = sorted(memory_block.get("known_facts") or [])
+    summary = memory_block.get("conversation_summary")
+    history = list(memory_block.get("recent_conversation") or [])
+
+    prefix = [{"role": "system", "content": system_prompt}]
+    prefix.append({
+        "role": "system",
+        "content": "Known user memory:\n" + ("\n".join(facts) if facts else "No memory available")
+    })
+
+    current = {"role": "user", "content": f'User message: "{user_text}"'}
+
+    def assemble():
+        messages = list(prefix)
+        if summary:
+            messages.append({"role": "system", "content": f"Earlier in this conversation:\n{summary}"})
+        messages.extend(_turn_message(t) for t in history)
+        messages.append(current)
+        return messages
+
+    messages = assemble()
+    prompt_tokens = count_message_tokens(messages)
+
+    while history and prompt_tokens > PROMPT_TOKEN_BUDGET:
+        summary = summarize_turns(history[:2], summary)
+        history = history[2:]
+        messages = assemble()
+        prompt_tokens = count_message_tokens(messages)
+
+    max_tokens = max(MIN_RESPONSE_TOKENS, min(MAX_RESPONSE_TOKENS, TURN_TOKEN_BUDGET - prompt_tokens))
+
+    return {
+        "messages": messages,
+        "prompt_tokens": prompt_tokens,
+        "max_tokens": max_tokens,
+    }
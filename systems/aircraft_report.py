@@ -1,10 +1,10 @@
 import os
 import math
 import time
-import requests
 import webbrowser
-import re
-from difflib import SequenceMatcher
+
+from http_client import get_session
+from intent_router import CommandMatcher, tokenize
 
 MY_LAT = float(os.getenv("LAT", 40.7908711))
 MY_LON = float(os.getenv("LON", -73.3746079))
@@ -13,37 +13,23 @@ OPENSKY_STATES = "https://opensky-network.org/api/states/all"
 OPENSKY_FLIGHTS = "https://opensky-network.org/api/flights/aircraft"
 
 
-def _normalize(text: str):
-    if not text:
-        return ""
-    text = text.lower()
-    text = re.sub(r"[^a-z0-9\s]", "", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
-
-
-def _smart_match(user_input: str, command: str):
-    user = _normalize(str(user_input) if user_input else "")
-    cmd = _normalize(str(command) if command else "")
-
-    if cmd in user:
-        return True
-
-    user_words = set(user.split())
-    cmd_words = set(cmd.split())
-
-    if cmd_words and len(user_words & cmd_words) / len(cmd_words) >= 0.6:
-        return True
+DETAILED_COMMANDS = CommandMatcher([
+    "give me aircraft details",
+    "detailed aircraft report",
+    "full detailed aircraft report",
+])
 
-    return SequenceMatcher(None, user, cmd).ratio() >= 0.6
+OPEN_COMMANDS = CommandMatcher(["open aircraft", "open flight radar", "show aircraft map"])
 
+SUMMARY_COMMANDS = CommandMatcher(["planes nearby", "how many aircraft", "how many planes"])
 
-def match_commands(user_input: str, commands):
-    if not commands:
-        return False
-    if not isinstance(commands, (list, tuple)):
-        commands = [commands]
-    return any(_smart_match(user_input, cmd) for cmd in commands)
+AIRCRAFT_KEYWORDS = CommandMatcher(
+    [
+        "aircraft", "aircrafts", "airplane", "airplanes", "plane", "planes",
+        "flight", "flights", "air traffic",
+    ],
+    fuzzy=False,
+)
 
 
 def haversine(lat1, lon1, lat2, lon2):
@@ -64,8 +50,9 @@ def get_nearby_aircraft(radius_km=200):
     lomin, lomax = MY_LON - 1, MY_LON + 1
 
     try:
-        r = requests.get(
-            f"{OPENSKY_STATES}?lamin={lamin}&lamax={lamax}&lomin={lomin}&lomax={lomax}",
+        r = get_session().get(
+            OPENSKY_STATES,
+            params={"lamin": lamin, "lamax": lamax, "lomin": lomin, "lomax": lomax},
             timeout=10,
         )
         data = r.json()
@@ -99,8 +86,9 @@ def get_flight_route(icao24):
     now = int(time.time())
     begin = now - 6 * 3600
     try:
-        r = requests.get(
-            f"{OPENSKY_FLIGHTS}?icao24={icao24}&begin={begin}&end={now}",
+        r = get_session().get(
+            OPENSKY_FLIGHTS,
+            params={"icao24": icao24, "begin": begin, "end": now},
             timeout=10
         )
         flights = r.json()
@@ -163,32 +151,25 @@ def aircraft_action(parameters=None, player=None, session_memory=None):
     return generate_aircraft_report()
 
 
+def is_aircraft_command(user_text: str) -> bool:
+    words = tokenize(user_text)
+    return any(m(words) for m in (DETAILED_COMMANDS, OPEN_COMMANDS, SUMMARY_COMMANDS, AIRCRAFT_KEYWORDS))
+
+
 def handle_aircraft_command(user_text: str):
-    txt = (user_text or "").strip().lower()
-
-    detailed_cmds = [
-        "give me aircraft details",
-        "detailed aircraft report",
-        "full detailed aircraft report",
-    ]
-    if match_commands(txt, detailed_cmds):
+    words = tokenize(user_text)
+
+    if DETAILED_COMMANDS(words):
         return generate_aircraft_report()
 
-    open_cmds = ["open aircraft", "open flight radar", "show aircraft map"]
-    if match_commands(txt, open_cmds):
+    if OPEN_COMMANDS(words):
         try:
             webbrowser.open(f"https://www.flightradar24.com/{MY_LAT},{MY_LON}/10")
         except Exception:
             pass
         return "Opening aircraft radar, sir."
 
-    summary_cmds = ["planes nearby", "how many aircraft", "how many planes"]
-    if match_commands(txt, summary_cmds):
-        planes = get_nearby_aircraft()
-        return f"Sir, I currently detect {len(planes)} aircraft nearby."
-
-    keywords = ["aircraft", "airplane", "plane", "flight", "air traffic"]
-    if any(k in txt for k in keywords):
+    if SUMMARY_COMMANDS(words) or AIRCRAFT_KEYWORDS(words):
         planes = get_nearby_aircraft()
         return f"Sir, I currently detect {len(planes)} aircraft nearby."
 
@@ -1,10 +1,12 @@
 import re
 import webbrowser
 from urllib.parse import quote_plus
-from serpapi import GoogleSearch
 from memory.config_manager import get_serpapi_key
+from http_client import get_session
+from tracing import span
 
 MAX_NEWS_ITEMS = 3
+SERPAPI_URL = "https://serpapi.com/search.json"
 
 
 
@@ -88,6 +90,14 @@ def format_news_output(news_items: list) -> str:
 
 
 
+def _serpapi_get(params: dict) -> dict:
+    # Same endpoint GoogleSearch.get_dict() calls, but over the pooled session.
+    with span("serpapi", engine=params.get("engine", "google")):
+        response = get_session().get(SERPAPI_URL, params=params, timeout=15)
+        return response.json()
+
+
+
 def serpapi_search(query: str) -> str:
 
     api_key = get_serpapi_key()
@@ -115,15 +125,13 @@ def serpapi_search(query: str) -> str:
 
     try:
         params = {**base_params, "engine": "google_news"}
-        search = GoogleSearch(params)
-        data = search.get_dict()
+        data = _serpapi_get(params)
         results = data.get("news_results", [])
 
     except Exception:
         try:
             params = {**base_params, "engine": "google"}
-            search = GoogleSearch(params)
-            data = search.get_dict()
+            data = _serpapi_get(params)
             results = data.get("organic_results", [])
         except Exception:
             return "Sir, I couldn't connect to the search service."
@@ -0,0 +1,213 @@
+"""
+Per-turn latency tracing.
+
+    with span("llm", cached=False):
+        ...
+
+Spans are tagged with the current trace ID, a contextvar, so they follow
+the turn through asyncio tasks and asyncio.to_thread; plain threads need
+contextvars.copy_context().run. Finished spans go to an in-memory ring
+buffer; export_jsonl() appends them to logs/traces.jsonl and summary()
+gives p50/p95/p99 per span name.
+
+Enabled with AERIS_TRACE=1. Disabled, span() returns a shared no-op
+context manager and nothing is recorded. AERIS_TRACE_RESOURCES=1 adds
+process CPU time and peak RSS to every span.
+"""
+
+import atexit
+import contextvars
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def get_base_dir():
+    if getattr(sys, "frozen", False):
+        return Path(sys.executable).parent
+    return Path(__file__).resolve().parent
+
+
+BASE_DIR = get_base_dir()
+TRACE_PATH = Path(os.getenv("AERIS_TRACE_PATH", BASE_DIR / "logs" / "traces.jsonl"))
+
+TRACE_ENABLED = os.getenv("AERIS_TRACE", "0") == "1"
+TRACE_RESOURCES = os.getenv("AERIS_TRACE_RESOURCES", "0") == "1"
+TRACE_BUFFER = int(os.getenv("AERIS_TRACE_BUFFER", "4096"))
+
+_trace_id = contextvars.ContextVar("aeris_trace_id", default=None)
+_trace_ids = itertools.count(1)
+
+_records = deque(maxlen=TRACE_BUFFER)
+_durations = defaultdict(lambda: deque(maxlen=TRACE_BUFFER))
+_export_lock = threading.Lock()
+_listeners = []
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("name", "attrs", "start", "cpu")
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+        self.start = 0.0
+        self.cpu = 0.0
+
+    def __enter__(self):
+        if TRACE_RESOURCES:
+            self.cpu = time.process_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        if TRACE_RESOURCES:
+            # Process-wide, so concurrent stages share the CPU they overlap on.
+            self.attrs["cpu_ms"] = round((time.process_time() - self.cpu) * 1000, 3)
+            self.attrs["peak_rss_kb"] = peak_rss_kb()
+        _record(self.name, self.start, end, self.attrs)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+def peak_rss_kb() -> int | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _record(name: str, start: float, end: float, attrs: dict) -> None:
+    duration_ms = (end - start) * 1000
+    rec = {
+        "trace": _trace_id.get(),
+        "span": name,
+        "start": start,
+        "duration_ms": round(duration_ms, 3),
+        "thread": threading.current_thread().name,
+        **attrs,
+    }
+    _durations[name].append(duration_ms)
+    _records.append(rec)
+
+    for listener in _listeners:
+        listener(rec)
+
+
+def subscribe(listener) -> None:
+    """listener(record) is called for every finished span, on the thread that ended it."""
+    _listeners.append(listener)
+
+
+def start_trace() -> int | None:
+    """Starts a new trace in the current context and returns its ID."""
+    if not TRACE_ENABLED:
+        return None
+    trace_id = next(_trace_ids)
+    _trace_id.set(trace_id)
+    return trace_id
+
+
+def current_trace() -> int | None:
+    return _trace_id.get()
+
+
+def span(name: str, **attrs):
+    if not TRACE_ENABLED:
+        return _NOOP
+    return Span(name, attrs)
+
+
+def record(name: str, duration_ms: float, **attrs) -> None:
+    """Records a duration measured elsewhere (e.g. time to first audio)."""
+    if not TRACE_ENABLED:
+        return
+    end = time.perf_counter()
+    _record(name, end - duration_ms / 1000, end, attrs)
+
+
+def _percentile(values: list[float], q: float) -> float:
+    index = min(len(values) - 1, max(0, round(q * (len(values) - 1))))
+    return values[index]
+
+
+def summary() -> dict:
+    result = {}
+    for name, durations in list(_durations.items()):
+        values = sorted(durations)
+        if not values:
+            continue
+        result[name] = {
+            "count": len(values),
+            "p50": _percentile(values, 0.50),
+            "p95": _percentile(values, 0.95),
+            "p99": _percentile(values, 0.99),
+        }
+    return result
+
+
+def print_summary() -> None:
+    stats = summary()
+    if not stats:
+        return
+
+    print(f"{'span':<24}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, s in sorted(stats.items()):
+        print(f"{name:<24}{s['count']:>7}{s['p50']:>10.1f}{s['p95']:>10.1f}{s['p99']:>10.1f}")
+
+
+def export_jsonl(path: Path = TRACE_PATH) -> int:
+    """Appends buffered spans to path and clears the buffer. Returns the count."""
+    with _export_lock:
+        records = []
+        while _records:
+            records.append(_records.popleft())
+
+        if not records:
+            return 0
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            for rec in records:
+                f.write(json.dumps(rec, default=str) + "\n")
+
+    return len(records)
+
+
+def _at_exit() -> None:
+    export_jsonl()
+    print_summary()
+
+
+if TRACE_ENABLED:
+    atexit.register(_at_exit)
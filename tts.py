@@ -1,10 +1,30 @@
 import io
+import os
+import re
+import sys
+import time
+import queue
 import asyncio
+import hashlib
 import threading
+import contextvars
+from pathlib import Path
+from collections import OrderedDict
+import numpy as np
 import sounddevice as sd
 import soundfile as sf
 import edge_tts
 
+from tracing import span, record
+
+
+def get_base_dir():
+    if getattr(sys, "frozen", False):
+        return Path(sys.executable).parent
+    return Path(__file__).resolve().parent
+
+
+BASE_DIR = get_base_dir()
 
 VOICE = "en-US-MichelleNeural"
 
@@ -12,43 +32,278 @@ RATE = "+0%"
 VOLUME = "+0%"
 PITCH = "+0Hz"
 
-stop_speaking_flag = threading.Event()
+# How many sentences may be synthesized ahead of the one playing.
+SYNTH_AHEAD = 2
+MIN_SENTENCE_CHARS = 20
+BLOCK_SIZE = 1024
+
+# Decoded PCM of already spoken sentences, played straight from disk.
+CACHE_DIR = BASE_DIR / "cache" / "tts"
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Fixed replies worth having on disk before they are first needed.
+CANNED_PHRASES = [
+    "Sir, I didn't catch that.",
+    "OpenRouter API key is missing, Sir.",
+    "Sir, the request timed out.",
+    "Sir, a system error occurred.",
+    "Opening aircraft radar, sir.",
+    "Sir, no aircraft detected in your operational airspace.",
+    "Sir, I could not determine the alarm time.",
+    "Sir, your alarm is ringing.",
+    "Sir, I couldn't understand the search request.",
+    "Sir, the web search system is not configured.",
+    "Sir, I couldn't connect to the search service.",
+    "Sir, who should I send the message to?",
+    "Sir, what should I say?",
+]
+
+# Cancel events of the playbacks in progress; stop_speaking() sets them all.
+_active_playbacks = set()
+_active_lock = threading.Lock()
+
+last_time_to_first_audio: float | None = None
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|\n+")
+
+
+def split_sentences(text: str) -> list[str]:
+    """
+    Splits text into sentences for pipelined synthesis.
+    Very short fragments are merged forward so prosody doesn't get choppy.
+    """
+    parts = [p.strip() for p in _SENTENCE_END.split(text) if p and p.strip()]
+
+    sentences = []
+    pending = ""
+
+    for part in parts:
+        pending = f"{pending} {part}".strip()
+        if len(pending) >= MIN_SENTENCE_CHARS:
+            sentences.append(pending)
+            pending = ""
+
+    if pending:
+        if sentences and len(pending) < MIN_SENTENCE_CHARS // 2:
+            sentences[-1] = f"{sentences[-1]} {pending}"
+        else:
+            sentences.append(pending)
+
+    return sentences
+
+
+def iter_sentences(chunks):
+    """
+    Sentences from streamed text chunks (e.g. LLM deltas), each yielded
+    as soon as the text after it shows it is complete.
+    """
+    pending = ""
+
+    for chunk in chunks:
+        pending += chunk
+
+        last_end = None
+        for last_end in _SENTENCE_END.finditer(pending):
+            pass
+
+        if last_end is None or len(pending[:last_end.start()].strip()) < MIN_SENTENCE_CHARS:
+            continue
+
+        yield from split_sentences(pending[:last_end.start()])
+        pending = pending[last_end.end():]
 
+    if pending.strip():
+        yield from split_sentences(pending)
 
-def edge_speak(text: str, ui=None):
+
+def edge_speak(text, ui=None, cancel_event: threading.Event | None = None):
     """
     Fully blocking TTS.
     UI speaking state is synchronized
     exactly when audio playback starts.
+
+    Sentences are synthesized ahead while earlier ones play,
+    so playback starts after the first sentence, not the whole text.
+    text may also be an iterator of streamed chunks, in which case each
+    sentence is spoken as soon as it has arrived.
+
+    Setting cancel_event (e.g. the turn's) or calling stop_speaking()
+    cuts playback short.
     """
 
-    if not text or not text.strip():
-        return
+    if isinstance(text, str):
+        if not text.strip():
+            return
+        sentences = split_sentences(text.strip())
+    else:
+        sentences = iter_sentences(text)
 
-    stop_speaking_flag.clear()
+    cancel_event = cancel_event or threading.Event()
     finished_event = threading.Event()
+    started_at = time.perf_counter()
 
     def runner():
         try:
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
-            loop.run_until_complete(_speak_async(text.strip(), ui))
+            loop.run_until_complete(_speak_async(sentences, ui, started_at, cancel_event))
             loop.close()
         except Exception as e:
             print("EDGE TTS ERROR:", e)
         finally:
             finished_event.set()
 
-    threading.Thread(target=runner, daemon=True).start()
+    with _active_lock:
+        _active_playbacks.add(cancel_event)
+
+    try:
+        ctx = contextvars.copy_context()
+        threading.Thread(target=ctx.run, args=(runner,), daemon=True).start()
+        finished_event.wait()
+    finally:
+        with _active_lock:
+            _active_playbacks.discard(cancel_event)
+
+
+class PhraseCache:
+    """
+    On-disk LRU of decoded sentences.
+
+    Entries are keyed by a hash of the text and every voice setting,
+    stored as .npy files and memory-mapped on playback.
+    Recency is kept in the file mtime so it survives restarts.
+    """
 
-    finished_event.wait()
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[Path, int, int]] | None = None
+        self._total = 0
+        self._lock = threading.Lock()
 
+    @staticmethod
+    def key(text: str) -> str:
+        raw = "\0".join((VOICE, RATE, VOLUME, PITCH, text.strip()))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _load_index(self):
+        if self._entries is not None:
+            return
+
+        self._entries = OrderedDict()
+        self._total = 0
+
+        try:
+            files = sorted(self.directory.glob("*.npy"), key=lambda p: p.stat().st_mtime)
+        except OSError:
+            files = []
+
+        for path in files:
+            try:
+                key, samplerate = path.stem.split("_")
+                size = path.stat().st_size
+            except (ValueError, OSError):
+                continue
+
+            self._entries[key] = (path, int(samplerate), size)
+            self._total += size
+
+    def get(self, text: str):
+        key = self.key(text)
+
+        with self._lock:
+            self._load_index()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, None
+            self._entries.move_to_end(key)
+
+        path, samplerate, _ = entry
+
+        try:
+            data = np.load(path, mmap_mode="r")
+            os.utime(path)
+        except Exception:
+            with self._lock:
+                self._forget(key)
+            return None, None
 
+        return data, samplerate
 
-async def _speak_async(text: str, ui=None):
+    def put(self, text: str, data, samplerate: int):
+        key = self.key(text)
+        path = self.directory / f"{key}_{int(samplerate)}.npy"
+        tmp = path.with_suffix(".tmp")
+
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "wb") as f:
+                np.save(f, np.ascontiguousarray(data, dtype="float32"))
+            os.replace(tmp, path)
+            size = path.stat().st_size
+        except Exception as e:
+            print(f" TTS cache write failed: {e}")
+            tmp.unlink(missing_ok=True)
+            return
+
+        with self._lock:
+            self._load_index()
+            self._forget(key)
+            self._entries[key] = (path, int(samplerate), size)
+            self._total += size
+            self._evict()
+
+    def __contains__(self, text: str) -> bool:
+        with self._lock:
+            self._load_index()
+            return self.key(text) in self._entries
+
+    def _forget(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._total -= entry[2]
+
+    def _evict(self):
+        while self._total > self.max_bytes and len(self._entries) > 1:
+            key, (path, _, size) = self._entries.popitem(last=False)
+            self._total -= size
+            path.unlink(missing_ok=True)
+
+
+phrase_cache = PhraseCache(CACHE_DIR, CACHE_MAX_BYTES)
+
+
+def prewarm_cache(phrases: list[str] | None = None):
+    """
+    Synthesizes the given phrases (CANNED_PHRASES by default)
+    into the phrase cache on a background thread.
+    """
+
+    def runner():
+        loop = asyncio.new_event_loop()
+        try:
+            for phrase in phrases or CANNED_PHRASES:
+                for sentence in split_sentences(phrase):
+                    if sentence in phrase_cache:
+                        continue
+                    try:
+                        loop.run_until_complete(_synthesize(sentence))
+                    except Exception as e:
+                        print(f" TTS pre-warm failed: {e}")
+                        return
+        finally:
+            loop.close()
+
+    threading.Thread(target=runner, daemon=True).start()
+
+
+async def _synthesize(sentence: str, cancel_event: threading.Event | None = None):
+    data, samplerate = phrase_cache.get(sentence)
+    if data is not None:
+        return data, samplerate
 
     communicate = edge_tts.Communicate(
-        text=text,
+        text=sentence,
         voice=VOICE,
         rate=RATE,
         volume=VOLUME,
@@ -58,40 +313,138 @@ async def _speak_async(text: str, ui=None):
     audio_bytes = io.BytesIO()
 
     async for chunk in communicate.stream():
-        if stop_speaking_flag.is_set():
-            return
+        if cancel_event is not None and cancel_event.is_set():
+            return None, None
 
         if chunk["type"] == "audio":
             audio_bytes.write(chunk["data"])
 
+    if not audio_bytes.getbuffer().nbytes:
+        return None, None
+
     audio_bytes.seek(0)
 
     data, samplerate = sf.read(audio_bytes, dtype="float32")
-    channels = data.shape[1] if len(data.shape) > 1 else 1
+    phrase_cache.put(sentence, data, samplerate)
 
-    if ui:
-        ui.stop_processing()
-        ui.start_speaking()
+    return data, samplerate
+
+
+async def _speak_async(sentences, ui, started_at: float, cancel_event: threading.Event):
+
+    chunks = queue.Queue(maxsize=SYNTH_AHEAD)
+    errors = []
+
+    ctx = contextvars.copy_context()
+    player = threading.Thread(
+        target=ctx.run,
+        args=(_play_chunks, chunks, ui, started_at, cancel_event, errors),
+        daemon=True,
+    )
+    player.start()
+
+    try:
+        # Streamed sentences block this private loop until they arrive.
+        for sentence in sentences:
+            if cancel_event.is_set() or not player.is_alive():
+                break
+
+            with span("tts.synthesize", chars=len(sentence)):
+                data, samplerate = await _synthesize(sentence, cancel_event)
+            if data is None:
+                continue
+
+            while not cancel_event.is_set() and player.is_alive():
+                try:
+                    chunks.put_nowait((data, samplerate))
+                    break
+                except queue.Full:
+                    await asyncio.sleep(0.02)
+
+    finally:
+        while player.is_alive():
+            try:
+                chunks.put_nowait(None)
+                break
+            except queue.Full:
+                await asyncio.sleep(0.02)
+
+        await asyncio.to_thread(player.join)
+
+    if errors:
+        raise errors[0]
+
+
+def _play_chunks(chunks: queue.Queue, ui, started_at: float, cancel_event: threading.Event, errors: list):
+    """Plays queued (data, samplerate) chunks until None. Exceptions go to errors."""
+    global last_time_to_first_audio
+
+    stream = None
+    stream_format = None
+    started = False
 
     try:
-        with sd.OutputStream(
-            samplerate=samplerate,
-            channels=channels,
-            dtype="float32",
-        ) as stream:
+        while not cancel_event.is_set():
+            try:
+                item = chunks.get(timeout=0.05)
+            except queue.Empty:
+                continue
+
+            if item is None:
+                break
 
-            block_size = 1024
+            data, samplerate = item
+            channels = data.shape[1] if len(data.shape) > 1 else 1
 
-            for start in range(0, len(data), block_size):
-                if stop_speaking_flag.is_set():
+            if stream is None or stream_format != (samplerate, channels):
+                if stream is not None:
+                    stream.stop()
+                    stream.close()
+
+                stream = sd.OutputStream(
+                    samplerate=samplerate,
+                    channels=channels,
+                    dtype="float32",
+                )
+                stream.start()
+                stream_format = (samplerate, channels)
+
+            if not started:
+                started = True
+                last_time_to_first_audio = time.perf_counter() - started_at
+                print(f" TTS first audio after {last_time_to_first_audio * 1000:.0f} ms")
+                record("tts.first_audio", last_time_to_first_audio * 1000)
+
+                if ui:
+                    ui.stop_processing()
+                    ui.start_speaking()
+
+            for start in range(0, len(data), BLOCK_SIZE):
+                if cancel_event.is_set():
                     break
 
-                stream.write(data[start:start + block_size])
+                stream.write(data[start:start + BLOCK_SIZE])
+
+    except Exception as e:
+        errors.append(e)
 
     finally:
-        if ui:
+        if stream is not None:
+            try:
+                if cancel_event.is_set():
+                    stream.abort()
+                else:
+                    stream.stop()
+                stream.close()
+            except Exception:
+                pass
+
+        if ui and started:
             ui.stop_speaking()
 
 
 def stop_speaking():
-    stop_speaking_flag.set()
+    """Stops every playback in progress."""
+    with _active_lock:
+        for cancel_event in _active_playbacks:
+            cancel_event.set()
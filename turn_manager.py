@@ -0,0 +1,101 @@
+import asyncio
+import itertools
+import threading
+
+
+class Turn:
+    """
+    One user turn. cancel_event is for worker threads (LLM stream, prefetch),
+    task is the asyncio task running the turn.
+    """
+
+    def __init__(self, turn_id: int):
+        self.id = turn_id
+        self.cancel_event = threading.Event()
+        self.task: asyncio.Task | None = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def cancel(self) -> None:
+        """Safe to call from any thread."""
+        self.cancel_event.set()
+
+        task = self.task
+        if task is None or task.done():
+            return
+
+        loop = task.get_loop()
+        try:
+            if asyncio.get_running_loop() is loop:
+                task.cancel()
+                return
+        except RuntimeError:
+            pass
+        loop.call_soon_threadsafe(task.cancel)
+
+
+class TurnManager:
+    """
+    Keeps at most one live turn. Starting a turn supersedes the previous
+    one, interrupt() cancels it, and is_current() lets code that resumes
+    after a thread hop drop results from a turn that is no longer live.
+    """
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.current: Turn | None = None
+
+    def begin(self) -> Turn:
+        turn = Turn(next(self._ids))
+
+        with self._lock:
+            previous, self.current = self.current, turn
+
+        if previous is not None:
+            print(f" Turn {previous.id} superseded by turn {turn.id}")
+            previous.cancel()
+
+        return turn
+
+    async def run(self, turn: Turn, coro) -> bool:
+        """
+        Runs coro as the turn's task. Returns False if the turn was cancelled.
+        Cancelling the turn never cancels the caller.
+        """
+        turn.task = asyncio.create_task(coro)
+
+        if turn.cancelled:
+            turn.task.cancel()
+
+        try:
+            await asyncio.wait({turn.task})
+        except asyncio.CancelledError:
+            turn.cancel()
+            raise
+
+        with self._lock:
+            if self.current is turn:
+                self.current = None
+
+        if turn.task.cancelled():
+            print(f" Turn {turn.id} cancelled")
+            return False
+
+        exc = turn.task.exception()
+        if exc is not None:
+            print(f" Turn {turn.id} failed: {exc}")
+        return exc is None
+
+    def is_current(self, turn: Turn) -> bool:
+        return self.current is turn and not turn.cancelled
+
+    def interrupt(self) -> Turn | None:
+        with self._lock:
+            turn, self.current = self.current, None
+
+        if turn is not None:
+            turn.cancel()
+        return turn
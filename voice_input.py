@@ -1,13 +1,16 @@
 import sounddevice as sd
+import numpy as np
 import vosk
-import queue
 import sys
 import json
 import threading
+from concurrent.futures import Future
 from pathlib import Path
 import time
 import os
 
+from tracing import span
+
 
 def get_base_dir():
     if getattr(sys, "frozen", False):
@@ -21,25 +24,280 @@ MODEL_NAME = "vosk-model-small-en-us-0.15"
 MODEL_PATH = BASE_DIR / MODEL_NAME
 
 
+SAMPLE_RATE = 16000
+BLOCK_SIZE = 1600          # 100 ms per block
+RING_SECONDS = 10
+
+# Blocks replayed into the command recognizer before its start point:
+# after a wake word, the block that contained it (words said right after
+# "Aeris" often land in it, and the tail of "Aeris" that comes along is
+# stripped again), after push-to-talk a short lead-in.
+WAKE_PREROLL_BLOCKS = 1
+PTT_PREROLL_BLOCKS = 3
+
+# Restrict the wake recognizer to WAKE_ALIASES + [unk] and decide on
+# partial hypotheses. Much cheaper than full dictation for a 24/7 listener.
+WAKE_GRAMMAR = True
+
+# Voice activity detection in front of the recognizers.
+VAD_FRAME_MS = 20
+VAD_ENERGY_RATIO = 3.0      # speech when energy is this far above the noise floor
+VAD_MIN_FLOOR = 1e-5        # lower bound for the noise floor (normalized energy)
+VAD_ZCR_MAX = 0.25          # above this, frames need twice the energy to count
+VAD_SPEECH_FRACTION = 0.3   # share of speech frames that makes a block speech
+VAD_HANGOVER_MS = 300       # keep feeding the recognizer this long after speech
+VAD_PADDING_BLOCKS = 2      # silence replayed in front of a speech onset
+END_OF_UTTERANCE_MS = 700   # silence that ends a command in record_voice
+
+# Said while Aeris is talking, these cut the current turn short.
+BARGE_IN_PHRASES = ["stop", "mute", "cancel", "be quiet", "shut up", "enough"]
+# There is no echo cancellation, so the mic also hears Aeris. A barge-in
+# needs this many consecutive hits, each louder than BARGE_IN_MIN_LEVEL and
+# BARGE_IN_ECHO_RATIO times the running level of the speaker echo.
+BARGE_IN_CONFIRM_HITS = 2
+BARGE_IN_MIN_LEVEL = 0.2
+BARGE_IN_ECHO_RATIO = 1.5
+LEVEL_GAIN = 8.0
+
+stop_listening_flag = threading.Event()
 
-if not MODEL_PATH.exists():
-    raise RuntimeError(
-        "ERROR: Vosk model not found.\n"
-        "Bootstrap should have installed it."
-    )
+level_callback = None
 
-print("Loading Vosk model...")
-model = vosk.Model(str(MODEL_PATH))
+_model_future: Future | None = None
+_model_lock = threading.Lock()
 
 
-q = queue.Queue()
-stop_listening_flag = threading.Event()
+def _load_model(future: Future):
+    try:
+        if not MODEL_PATH.exists():
+            raise RuntimeError(
+                "ERROR: Vosk model not found.\n"
+                "Bootstrap should have installed it."
+            )
+
+        print("Loading Vosk model...")
+        started = time.perf_counter()
+        loaded = vosk.Model(str(MODEL_PATH))
+        print(f"Vosk model loaded in {time.perf_counter() - started:.2f}s")
+
+        future.set_result(loaded)
+    except Exception as e:
+        future.set_exception(e)
+
+
+def load_model_async() -> Future:
+    """
+    Starts loading the Vosk model on a background thread (only once)
+    and returns a future that resolves to the model.
+    """
+    global _model_future
+
+    with _model_lock:
+        if _model_future is None:
+            _model_future = Future()
+            threading.Thread(
+                target=_load_model,
+                args=(_model_future,),
+                daemon=True
+            ).start()
+
+    return _model_future
+
+
+def get_model(timeout: float | None = None):
+    return load_model_async().result(timeout)
+
+
+def is_model_ready() -> bool:
+    future = _model_future
+    return future is not None and future.done() and future.exception() is None
+
+
+def set_level_callback(callback):
+    """
+    callback(level) receives the input level (0..1) while a command is recorded.
+    """
+    global level_callback
+    level_callback = callback
+
+
+def _report_level(level: float):
+    if level_callback:
+        try:
+            level_callback(level)
+        except Exception:
+            pass
+
+
+class EnergyVAD:
+    """
+    Frame energy + zero-crossing rate detector with hangover smoothing.
+
+    feed() returns the blocks that should reach the recognizer:
+    nothing during silence, the padded onset when speech starts,
+    and every block until the hangover after speech has expired.
+    The noise floor keeps adapting and survives reset().
+    """
+
+    def __init__(self, samplerate=SAMPLE_RATE, blocksize=BLOCK_SIZE):
+        self.frame_len = int(samplerate * VAD_FRAME_MS / 1000)
+        self.block_ms = blocksize * 1000 / samplerate
+        self.noise_floor = None
+        self.reset()
+
+    def reset(self):
+        self.active = False
+        self.heard_speech = False
+        self.silence_ms = 0.0
+        self.level = 0.0
+        self._padding = []
+
+    def _classify(self, block: bytes) -> bool:
+        samples = np.frombuffer(block, dtype=np.int16).astype(np.float32) / 32768.0
+        count = len(samples) // self.frame_len
+        if count == 0:
+            return False
+
+        frames = samples[:count * self.frame_len].reshape(count, self.frame_len)
+        energy = np.mean(frames * frames, axis=1)
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+        self.level = min(1.0, float(np.sqrt(energy.mean())) * LEVEL_GAIN)
+
+        if self.noise_floor is None:
+            self.noise_floor = max(float(np.median(energy)), VAD_MIN_FLOOR)
+
+        threshold = self.noise_floor * VAD_ENERGY_RATIO
+        speech = (energy > threshold) & ((zcr < VAD_ZCR_MAX) | (energy > threshold * 2))
+
+        quiet = energy[~speech]
+        if quiet.size:
+            self.noise_floor = max(
+                VAD_MIN_FLOOR,
+                0.95 * self.noise_floor + 0.05 * float(quiet.mean())
+            )
+
+        return speech.mean() >= VAD_SPEECH_FRACTION
+
+    def feed(self, block: bytes) -> list[bytes]:
+        if self._classify(block):
+            self.heard_speech = True
+            self.silence_ms = 0.0
+
+            if not self.active:
+                self.active = True
+                out = self._padding + [block]
+                self._padding = []
+                return out
+
+            return [block]
+
+        self.silence_ms += self.block_ms
+
+        if self.active and self.silence_ms <= VAD_HANGOVER_MS:
+            return [block]
+
+        self.active = False
+        self._padding = (self._padding + [block])[-VAD_PADDING_BLOCKS:]
+        return []
+
+
+class AudioPipeline:
+    """
+    One always-open microphone stream feeding a ring buffer.
+
+    Recognizers attach as consumers, each with its own read cursor,
+    so switching from wake-word to command recognition neither
+    reopens the device nor drops or leaks frames.
+    """
+
+    def __init__(self, samplerate=SAMPLE_RATE, blocksize=BLOCK_SIZE, seconds=RING_SECONDS):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.capacity = max(1, int(seconds * samplerate / blocksize))
+
+        self._blocks: list[bytes | None] = [None] * self.capacity
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._stream = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._stream is not None:
+                return
+
+            self._stream = sd.RawInputStream(
+                samplerate=self.samplerate,
+                blocksize=self.blocksize,
+                dtype='int16',
+                channels=1,
+                callback=self._callback
+            )
+            self._stream.start()
+
+    def close(self):
+        with self._start_lock:
+            if self._stream is not None:
+                self._stream.close()
+                self._stream = None
+
+    def _callback(self, indata, frames, time_info, status):
+        if status:
+            print(status, file=sys.stderr)
+
+        with self._cond:
+            self._blocks[self._seq % self.capacity] = bytes(indata)
+            self._seq += 1
+            self._cond.notify_all()
+
+    @property
+    def position(self) -> int:
+        return self._seq
+
+    def oldest(self) -> int:
+        return max(0, self._seq - self.capacity)
+
+    def consumer(self, position: int | None = None) -> "AudioConsumer":
+        self.start()
+        if position is None:
+            position = self._seq
+        return AudioConsumer(self, max(position, self.oldest()))
+
+    def read(self, position: int, timeout: float):
+        with self._cond:
+            if position < self.oldest():
+                position = self.oldest()
+
+            if position >= self._seq:
+                self._cond.wait(timeout)
+                if position >= self._seq:
+                    return None, position
+
+            return self._blocks[position % self.capacity], position + 1
 
 
-def callback(indata, frames, time_info, status):
-    if status:
-        print(status, file=sys.stderr)
-    q.put(bytes(indata))
+class AudioConsumer:
+    def __init__(self, pipeline: AudioPipeline, position: int):
+        self.pipeline = pipeline
+        self.position = position
+
+    def read(self, timeout: float = 0.1) -> bytes | None:
+        block, self.position = self.pipeline.read(self.position, timeout)
+        return block
+
+
+pipeline = AudioPipeline()
+vad = EnergyVAD()
+
+_wake_position: int | None = None
+_wake_recognizer = None
+_command_recognizer = None
+_barge_in_recognizer = None
+_barge_in_vad = EnergyVAD()
+_barge_in_lock = threading.Lock()  # one watcher at a time owns the recognizer
+_wake_lock = threading.Lock()      # one wake session at a time owns its recognizer and vad
 
 
  # Due to the inaccurate voice model when hearing wake words, wake aliases function so that AI can recognize similar words.
@@ -60,69 +318,265 @@ WAKE_ALIASES = [
 ]
 
 
-def listen_for_wake_word(wake_word="aeris", timeout=None):
-    print(f"Click the orb, or say '{wake_word}' to wake up Aeris...")
+# A wake word is detected on a partial hypothesis and its block is replayed
+# into the command recognizer, which then often hears only the word's tail
+# ("...is open spotify"). After a wake word, one leading tail fragment and
+# any filler after it are dropped.
+WAKE_FILLER = {"uh", "um", "erm", "hmm", "ok", "okay"}
+
+
+def _wake_fragments() -> set[str]:
+    fragments = set()
+    for alias in WAKE_ALIASES:
+        words = alias.split()
+        fragments.update(words[1:])
+        fragments.update(words[-1][i:] for i in range(1, len(words[-1]) - 1))
+    return fragments
+
+
+_WAKE_FRAGMENTS = _wake_fragments()
+
+
+def create_wake_recognizer(grammar: bool = WAKE_GRAMMAR):
+    if grammar:
+        return vosk.KaldiRecognizer(
+            get_model(),
+            SAMPLE_RATE,
+            json.dumps(WAKE_ALIASES + ["[unk]"])
+        )
+    return vosk.KaldiRecognizer(get_model(), SAMPLE_RATE)
+
+
+def _get_wake_recognizer():
+    global _wake_recognizer
+    if _wake_recognizer is None:
+        _wake_recognizer = create_wake_recognizer()
+    _wake_recognizer.Reset()
+    return _wake_recognizer
+
+
+def wake_word_in_block(rec, data: bytes, partial: bool = WAKE_GRAMMAR) -> bool:
+    """
+    Feeds one block to a wake recognizer.
+    With partial=True the decision is made on the running hypothesis
+    instead of waiting for the end of the utterance.
+    """
+    if rec.AcceptWaveform(data):
+        text = json.loads(rec.Result()).get("text", "")
+    elif partial:
+        text = json.loads(rec.PartialResult()).get("partial", "")
+    else:
+        return False
+
+    text = text.lower().replace("[unk]", " ")
+    if not text.strip():
+        return False
+
+    return any(alias in text for alias in WAKE_ALIASES)
+
+
+def _get_command_recognizer():
+    global _command_recognizer
+    if _command_recognizer is None:
+        _command_recognizer = vosk.KaldiRecognizer(get_model(), SAMPLE_RATE)
+    _command_recognizer.Reset()
+    return _command_recognizer
+
+
+def _strip_wake_word(text: str, after_wake: bool = False) -> str:
+    for alias in sorted(WAKE_ALIASES, key=len, reverse=True):
+        if text == alias:
+            return ""
+        if text.startswith(alias + " "):
+            text = text[len(alias) + 1:]
+            break
+    else:
+        if after_wake and text.split(" ", 1)[0] in _WAKE_FRAGMENTS:
+            text = text.partition(" ")[2]
+
+    if not after_wake:
+        return text
+
+    words = text.split()
+    while words and words[0] in WAKE_FILLER:
+        words = words[1:]
+    return " ".join(words)
+
+
+def watch_for_barge_in(on_barge_in, stop_event: threading.Event) -> bool:
+    """
+    Runs on its own thread while Aeris speaks. New pipeline audio goes
+    through a separate VAD into a BARGE_IN_PHRASES grammar recognizer;
+    on_barge_in() is called once a phrase has been heard, loud enough,
+    BARGE_IN_CONFIRM_HITS times in a row.
+    """
+    global _barge_in_recognizer
+
+    if not is_model_ready():
+        return False
+
+    # The previous turn's watcher may still be winding down.
+    while not _barge_in_lock.acquire(timeout=0.05):
+        if stop_event.is_set():
+            return False
+
+    try:
+        if _barge_in_recognizer is None:
+            _barge_in_recognizer = vosk.KaldiRecognizer(
+                get_model(),
+                SAMPLE_RATE,
+                json.dumps(BARGE_IN_PHRASES + ["[unk]"])
+            )
+
+        rec = _barge_in_recognizer
+        rec.Reset()
+        _barge_in_vad.reset()
+        consumer = pipeline.consumer()
+        echo_level = 0.0
+        hits = 0
+
+        while not stop_event.is_set():
+            data = consumer.read(timeout=0.05)
+            if data is None:
+                continue
 
-    rec = vosk.KaldiRecognizer(model, 16000)
-    start_time = time.time()
+            blocks = _barge_in_vad.feed(data)
+            level = _barge_in_vad.level
+            loud = level >= max(BARGE_IN_MIN_LEVEL, echo_level * BARGE_IN_ECHO_RATIO)
+
+            heard = False
+            for block in blocks:
+                if rec.AcceptWaveform(block):
+                    text = json.loads(rec.Result()).get("text", "")
+                else:
+                    text = json.loads(rec.PartialResult()).get("partial", "")
+
+                text = f" {text.lower()} "
+                heard = heard or any(f" {phrase} " in text for phrase in BARGE_IN_PHRASES)
+
+            if heard and loud:
+                hits += 1
+                if hits >= BARGE_IN_CONFIRM_HITS:
+                    print("Barge-in detected!")
+                    on_barge_in()
+                    return True
+            else:
+                hits = 0
+                echo_level += (level - echo_level) * 0.1
 
-    with sd.RawInputStream(
-        samplerate=16000,
-        blocksize=8000,
-        dtype='int16',
-        channels=1,
-        callback=callback
-    ):
-        while not stop_listening_flag.is_set():
+        return False
 
-            if timeout and (time.time() - start_time) > timeout:
-                return False
+    finally:
+        _barge_in_lock.release()
 
-            try:
-                data = q.get(timeout=0.1)
-            except queue.Empty:
-                continue
 
-            if rec.AcceptWaveform(data):
-                result = json.loads(rec.Result())
-                text = result.get("text", "").lower()
+def listen_for_wake_word(wake_word="aeris", timeout=None, stop_event: threading.Event | None = None):
+    """
+    Blocks until the wake word is heard (True), or until timeout,
+    stop_event or stop_listening_flag ends the session (False).
+    Give every session its own stop_event: it is never cleared, so a
+    session that is told to stop always does.
+    """
+    global _wake_position
+
+    stop_event = stop_event or threading.Event()
+
+    def stopped():
+        return stop_event.is_set() or stop_listening_flag.is_set()
+
+    # A session that was just stopped may still be finishing its last block.
+    while not _wake_lock.acquire(timeout=0.05):
+        if stopped():
+            return False
+
+    try:
+        print(f"Click the orb, or say '{wake_word}' to wake up Aeris...")
+
+        rec = _get_wake_recognizer()
+        vad.reset()
+        consumer = pipeline.consumer()
+        start_time = time.time()
+
+        while not stopped():
 
-                if not text:
-                    continue
+            if timeout and (time.time() - start_time) > timeout:
+                return False
 
+            data = consumer.read(timeout=0.1)
+            if data is None:
+                continue
 
-                if any(alias in text for alias in WAKE_ALIASES):
+            for block in vad.feed(data):
+                if wake_word_in_block(rec, block):
                     print("Wake word detected!")
+                    _wake_position = consumer.position
                     return True
 
-    return False
+        return False
+
+    finally:
+        _wake_lock.release()
 
 
-def record_voice(prompt="Listening for command..."):
+def record_voice(prompt="Listening for command...", on_partial=None):
+    """
+    Records one command. on_partial(text), if given, receives the running
+    Vosk hypothesis after every block while the user is still speaking.
+    """
+    global _wake_position
+
     print(prompt)
 
-    rec = vosk.KaldiRecognizer(model, 16000)
+    rec = _get_command_recognizer()
+
+    after_wake = _wake_position is not None
+
+    if after_wake:
+        start = _wake_position - WAKE_PREROLL_BLOCKS
+        _wake_position = None
+    else:
+        start = pipeline.position - PTT_PREROLL_BLOCKS
+
+    vad.reset()
+    consumer = pipeline.consumer(start)
 
-    with sd.RawInputStream(
-        samplerate=16000,
-        blocksize=8000,
-        dtype='int16',
-        channels=1,
-        callback=callback
-    ):
+    try:
         while not stop_listening_flag.is_set():
 
-            try:
-                data = q.get(timeout=0.1)
-            except queue.Empty:
+            data = consumer.read(timeout=0.1)
+            if data is None:
                 continue
 
-            if rec.AcceptWaveform(data):
-                result = json.loads(rec.Result())
-                text = result.get("text", "").strip()
+            result = None
+
+            for block in vad.feed(data):
+                if rec.AcceptWaveform(block):
+                    result = json.loads(rec.Result())
+                    break
+
+            _report_level(vad.level)
+
+            if result is None and on_partial and vad.heard_speech:
+                partial = json.loads(rec.PartialResult()).get("partial", "")
+                partial = _strip_wake_word(partial.strip().lower(), after_wake)
+                if partial:
+                    on_partial(partial)
+
+            if result is None and vad.heard_speech and vad.silence_ms >= END_OF_UTTERANCE_MS:
+                with span("vosk.finalize"):
+                    result = json.loads(rec.FinalResult())
+                vad.reset()
+
+            if result is None:
+                continue
+
+            text = _strip_wake_word(result.get("text", "").strip().lower(), after_wake)
+
+            if text:
+                print("You:", text)
+                return text
 
-                if text:
-                    print("You:", text)
-                    return text
+    finally:
+        _report_level(0.0)
 
     return ""